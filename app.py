@@ -1,167 +1,137 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, render_template, request, redirect, url_for, jsonify, g, has_app_context
+from markupsafe import Markup
+from flask import before_render_template, template_rendered
 from database import *
+from forecast import (build_timeline, checkpoint_schedule, checkpoint_schedule_for_settings,
+                      load_checkpoint_snapshot, monthly_summary, parse_date)
+from payoff import MAX_MONTHS, STRATEGIES, simulate_payoff
+from risk import build_risk_plan, run_risk_analysis, summarize_window
+from scenario import apply_overrides
+from statements import detect_format, iter_statement
 from datetime import date, datetime, timedelta
-from calendar import monthrange
+from collections import deque
+from functools import lru_cache, wraps
+from time import perf_counter
 import os
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
-def calculate_checkpoints(count=None, mode=None, custom_days=None, start_date=None):
-    """Calculate checkpoint dates based on mode (1-10-20, nys-payroll, custom)"""
-    from datetime import timedelta
-    import json
-    
-    # Get settings if not provided
-    settings = get_settings()
-    if not count:
-        count = settings.get('checkpoint_count', 3)
-    if not mode:
-        mode = settings.get('checkpoint_mode', '1-10-20')
-    
-    today = date.today()
-    checkpoints = []
-    
-    if mode == '1-10-20':
-        # Original logic for 1/10/20 checkpoints
-        checkpoint_days = [1, 10, 20]
-        for month_offset in range(6):  # Generate more to ensure we have enough
-            target_date = today + timedelta(days=month_offset * 30)
-            year = target_date.year
-            month = target_date.month
-            
-            for day in checkpoint_days:
-                try:
-                    checkpoint_date = date(year, month, day)
-                    if checkpoint_date >= today:
-                        checkpoints.append(checkpoint_date)
-                except ValueError:
-                    pass  # Invalid date (e.g., Feb 31)
-    
-    elif mode == 'nys-payroll':
-        # NYS Admin payroll: bi-weekly Wednesdays
-        # Start from 11/5/2025 (last confirmed paycheck) and extrapolate forward
-        from datetime import timedelta
-        
-        # PEF Admin payroll base date: 11/5/2025 (Wednesday)
-        base_date = date(2025, 11, 5)
-        
-        # Go backwards to find earlier paychecks if needed
-        current = base_date
-        while current > date(2025, 1, 1):
-            current = current - timedelta(days=14)
-        
-        # Now go forward from earliest 2025 date
-        while len(checkpoints) < count * 3:  # Generate extra
-            if current >= today:
-                checkpoints.append(current)
-            current = current + timedelta(days=14)
-    
-    elif mode == 'custom':
-        # Custom days from settings
-        if not custom_days:
-            custom_days = settings.get('custom_checkpoint_days')
-        if custom_days:
-            days = json.loads(custom_days) if isinstance(custom_days, str) else custom_days
-            for month_offset in range(6):
-                target_date = today + timedelta(days=month_offset * 30)
-                year = target_date.year
-                month = target_date.month
-                
-                for day in days:
-                    try:
-                        checkpoint_date = date(year, month, int(day))
-                        if checkpoint_date >= today:
-                            checkpoints.append(checkpoint_date)
-                    except ValueError:
-                        pass
-    
-    # Sort and return requested count
-    checkpoints.sort()
-    return checkpoints[:count]
+# Opt-in request profiling: FINANCE_PROFILE=1 python app.py
+app.config['PROFILE'] = os.environ.get('FINANCE_PROFILE') == '1'
 
-def get_bills_for_period(start_date, end_date):
-    """Get all bills due between start and end date"""
-    bills = get_all_bills()
-    period_bills = []
-    
-    # Get last day of the target month
-    last_day_of_month = monthrange(end_date.year, end_date.month)[1]
+# One shared SQLite connection per request, closed when the app context ends
+app.teardown_appcontext(release_connection)
+
+# ==================== REQUEST PROFILING ====================
+
+# Most recent profiled requests; /api/debug/profile reports the slowest
+recent_profiles = deque(maxlen=200)
+
+def profiled(section):
+    """Decorator that adds a function's wall time to the request profile
     
-    for bill in bills:
-        if bill['status'] in ['pending', 'overdue']:
-            # Handle MONTHLY recurring bills with due_day
-            if bill['due_day'] and bill['frequency'] == 'monthly':
-                # Cap due_day at last day of month (e.g., 31 becomes 30 for November)
-                actual_due_day = min(bill['due_day'], last_day_of_month)
-                bill_date = date(end_date.year, end_date.month, actual_due_day)
-                if start_date <= bill_date <= end_date:
-                    bill['calculated_due_date'] = bill_date
-                    period_bills.append(bill)
-            # Handle bills with explicit due_date (one-time or non-monthly recurring)
-            elif bill['due_date']:
-                bill_due = datetime.strptime(bill['due_date'], '%Y-%m-%d').date()
-                if start_date <= bill_due <= end_date:
-                    bill['calculated_due_date'] = bill_due
-                    period_bills.append(bill)
+    Outside an app context (scripts, benchmark.py) the function just runs.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            sections = g.get('profile_sections') if has_app_context() else None
+            if sections is None:
+                return func(*args, **kwargs)
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sections[section] = sections.get(section, 0) + (perf_counter() - started) * 1000
+        return wrapper
+    return decorator
+
+@app.before_request
+def start_request_profile():
+    if app.config['PROFILE']:
+        g.profile_started = perf_counter()
+        g.profile_sections = {}
+        start_profile()
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    if g.get('profile_sections') is not None:
+        g.render_started = perf_counter()
+
+@template_rendered.connect_via(app)
+def stop_render_timer(sender, template, context, **extra):
+    sections = g.get('profile_sections')
+    if sections is not None and g.get('render_started'):
+        sections['render'] = sections.get('render', 0) + (perf_counter() - g.render_started) * 1000
+
+@app.after_request
+def finish_request_profile(response):
+    sections = g.get('profile_sections')
+    if sections is None:
+        return response
+    statements = stop_profile()
+    total_ms = (perf_counter() - g.profile_started) * 1000
+    sql_ms = sum(s['ms'] for s in statements)
     
-    # Add credit card minimum payments (always monthly)
-    credit_accounts = get_all_credit_accounts()
-    for account in credit_accounts:
-        if account['minimum_payment'] and account['payment_due_day']:
-            # Cap payment day at last day of month
-            actual_payment_day = min(account['payment_due_day'], last_day_of_month)
-            payment_date = date(end_date.year, end_date.month, actual_payment_day)
-            if start_date <= payment_date <= end_date:
-                period_bills.append({
-                    'name': f"{account['name']} - Min Payment",
-                    'amount': account['minimum_payment'],
-                    'category': 'Debt',
-                    'calculated_due_date': payment_date,
-                    'is_credit_payment': True
-                })
+    timings = [f'sql;dur={sql_ms:.2f};desc="{len(statements)} queries"']
+    timings += [f'{name};dur={ms:.2f}' for name, ms in sections.items()]
+    timings.append(f'total;dur={total_ms:.2f}')
+    response.headers['Server-Timing'] = ', '.join(timings)
     
-    return sorted(period_bills, key=lambda x: x['calculated_due_date'])
+    if request.path != '/api/debug/profile':
+        recent_profiles.append({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'total_ms': round(total_ms, 2),
+            'sql_ms': round(sql_ms, 2),
+            'query_count': len(statements),
+            'sections': {name: round(ms, 2) for name, ms in sections.items()},
+            'statements': [dict(s, ms=round(s['ms'], 3)) for s in statements]
+        })
+    return response
 
-def calculate_checkpoint_requirements():
-    """Calculate money needed for each checkpoint with full breakdown"""
-    checkpoints = calculate_checkpoints()
+def calculate_checkpoints(count=None, mode=None, custom_days=None, start_date=None, settings=None):
+    """Calculate checkpoint dates based on mode (1-10-20, nys-payroll, custom)"""
+    if settings is None:
+        settings = get_settings()
+    return checkpoint_schedule_for_settings(settings, count, mode, custom_days, start_date)
+
+@profiled('checkpoints')
+def calculate_checkpoint_requirements(snapshot=None):
+    """Calculate money needed for each checkpoint with full breakdown
+    
+    Checkpoint windows are read off a cash-flow timeline built once from the
+    snapshot, so month-spanning windows and non-monthly bills are included.
+    """
     today = date.today()
-    account = get_account_balance()
+    if snapshot is None:
+        snapshot = load_checkpoint_snapshot()
+    checkpoints = calculate_checkpoints(settings=snapshot['settings'])
     
-    # Use recurring income if available, otherwise fall back to regular income
-    recurring = get_recurring_income()
-    if recurring:
-        # Generate income from recurring sources for next 90 days
-        end_date = today + timedelta(days=90)
-        upcoming_income = generate_income_for_period(today, end_date)
-        # Convert to expected format
-        formatted_income = []
-        for inc in upcoming_income:
-            formatted_income.append({
-                'source': inc['source'],
-                'amount': inc['amount'],
-                'date_expected': inc['date_expected'].strftime('%Y-%m-%d') if isinstance(inc['date_expected'], date) else inc['date_expected']
-            })
-        upcoming_income = formatted_income
-    else:
-        upcoming_income = get_upcoming_income(90)
+    # Window ends: day before the next checkpoint, or 9 days after the last one
+    windows = []
+    for i, checkpoint in enumerate(checkpoints):
+        if i + 1 < len(checkpoints):
+            windows.append((checkpoint, checkpoints[i + 1] - timedelta(days=1)))
+        else:
+            windows.append((checkpoint, checkpoint + timedelta(days=9)))
+    
+    horizon = max([90] + [(end - today).days + 1 for _, end in windows])
+    timeline = build_timeline(snapshot, today, horizon)
     
     checkpoint_data = []
     
-    for i, checkpoint in enumerate(checkpoints):
+    for checkpoint, end in windows:
         # Get bills due BETWEEN this checkpoint and the NEXT checkpoint
         start = checkpoint
-        if i + 1 < len(checkpoints):
-            end = checkpoints[i + 1] - timedelta(days=1)
-        else:
-            end = checkpoint + timedelta(days=9)
-        
-        bills = get_bills_for_period(start, end)
+        events = timeline.events_between(start, end)
+        bills = [item for _, _, direction, item in events if direction < 0 and not item.get('is_past_due')]
         
         # Add past due instances to bills for this checkpoint
-        past_due_instances = get_past_due_instances()
-        for instance in past_due_instances:
+        for instance in snapshot['past_due_instances']:
             bills.append({
                 'name': f"{instance['item_name']} - {instance['period']} (PAST DUE)",
                 'amount': instance['amount'],
@@ -173,15 +143,7 @@ def calculate_checkpoint_requirements():
         total_bills = sum(bill['amount'] for bill in bills)
         
         # Get paychecks arriving DURING THIS PERIOD ONLY
-        period_paychecks = []
-        for inc in upcoming_income:
-            inc_date = datetime.strptime(inc['date_expected'], '%Y-%m-%d').date()
-            if start <= inc_date <= end:
-                period_paychecks.append({
-                    'source': inc['source'],
-                    'amount': inc['amount'],
-                    'date': inc_date
-                })
+        period_paychecks = [item for _, _, direction, item in events if direction > 0]
         
         period_income = sum(p['amount'] for p in period_paychecks)
         
@@ -206,22 +168,24 @@ def calculate_checkpoint_requirements():
     
     return checkpoint_data
 
-@app.route('/')
-def dashboard():
-    """Main dashboard view"""
+# Dashboard view model cache, keyed on (data generation, today)
+dashboard_cache = {'key': None, 'context': None}
+
+def build_dashboard_context():
+    """Compute everything the dashboard template needs"""
     account = get_account_balance()
     settings = get_settings()  # Get user settings for income/cushion
     overdue = get_overdue_bills()
-    past_due_instances = get_past_due_instances()  # Get all past due instances
-    checkpoints = calculate_checkpoint_requirements()
+    snapshot = load_checkpoint_snapshot()
+    past_due_instances = snapshot['past_due_instances']  # Get all past due instances
+    checkpoints = calculate_checkpoint_requirements(snapshot)
     upcoming_income = get_upcoming_income(30)
     recent_income = get_recent_income(30)
     utilization = get_credit_utilization()
     
     # Calculate total monthly obligations
-    all_bills = get_all_bills()
-    monthly_bills_total = sum(bill['amount'] for bill in all_bills if bill['frequency'] == 'monthly')
-    credit_minimums = sum(acc['minimum_payment'] for acc in get_all_credit_accounts())
+    monthly_bills_total = sum(bill['amount'] for bill in snapshot['bills'] if bill['frequency'] == 'monthly')
+    credit_minimums = sum(acc['minimum_payment'] for acc in snapshot['credit_accounts'])
     total_monthly = monthly_bills_total + credit_minimums
     
     # Update account with available balance (minus cushion)
@@ -229,7 +193,6 @@ def dashboard():
         account['available'] = account['balance'] - settings['cushion_amount']
     
     # Calculate tax interest
-    from datetime import datetime
     now = datetime.now()
     if now.year == 2025:
         months_passed = now.month - 1
@@ -239,18 +202,54 @@ def dashboard():
         tax_interest = 0
         tax_total = 3900
     
-    return render_template('dashboard.html',
-                         account=account,
-                         settings=settings,
-                         overdue=overdue,
-                         past_due_instances=past_due_instances,
-                         checkpoints=checkpoints,
-                         upcoming_income=upcoming_income,
-                         recent_income=recent_income,
-                         utilization=utilization,
-                         total_monthly=total_monthly,
-                         tax_interest=tax_interest,
-                         tax_total=tax_total)
+    return {
+        'account': account,
+        'settings': settings,
+        'overdue': overdue,
+        'past_due_instances': past_due_instances,
+        'checkpoints': checkpoints,
+        'upcoming_income': upcoming_income,
+        'recent_income': recent_income,
+        'utilization': utilization,
+        'total_monthly': total_monthly,
+        'tax_interest': tax_interest,
+        'tax_total': tax_total
+    }
+
+def get_dashboard_context():
+    """Get the dashboard view model, recomputing only after a write or a new day"""
+    key = (get_data_version(), date.today())
+    if dashboard_cache['key'] != key:
+        dashboard_cache['context'] = build_dashboard_context()
+        dashboard_cache['key'] = key
+    return dashboard_cache['context']
+
+@app.route('/')
+def dashboard():
+    """Main dashboard view"""
+    return render_template('dashboard.html', **get_dashboard_context())
+
+def to_json_value(value):
+    """Convert dates (recursively) to ISO strings for JSON responses"""
+    if isinstance(value, dict):
+        return {key: to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+@app.route('/api/dashboard')
+def api_dashboard():
+    """Dashboard data as JSON, with an ETag so unchanged data returns 304"""
+    etag = f"dashboard-{get_data_version()}-{date.today().isoformat()}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(to_json_value(get_dashboard_context()))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/credit')
 def credit_overview():
@@ -359,14 +358,7 @@ def add_income_route():
     amount = float(request.form.get('amount'))
     date_received = datetime.strptime(request.form.get('date'), '%Y-%m-%d').date()
     
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO income (source, amount, date_received, status)
-        VALUES (?, ?, ?, 'received')
-    ''', (source, amount, date_received))
-    conn.commit()
-    conn.close()
+    add_received_income(source, amount, date_received)
     
     return redirect(url_for('dashboard'))
 
@@ -388,13 +380,41 @@ def currency_filter(value):
     """Format value as currency"""
     return f"${value:,.2f}"
 
+@lru_cache(maxsize=4096)
+def format_date_string(value):
+    """Format a stored YYYY-MM-DD string (the same few dates repeat across a page)"""
+    return parse_date(value).strftime('%b %d, %Y')
+
 @app.template_filter('date_format')
 def date_format_filter(value):
-    """Format date nicely"""
+    """Format date nicely (accepts date objects or stored date strings)"""
+    if not value:
+        return ''
     if isinstance(value, str):
-        value = datetime.strptime(value, '%Y-%m-%d').date()
+        return format_date_string(value)
     return value.strftime('%b %d, %Y')
 
+# Rendered template fragments, valid until the next write or a new day
+fragment_cache = {'key': None, 'fragments': {}}
+
+@app.template_global()
+def cached_fragment(name, *keys, caller):
+    """Render a block once per data version, e.g.
+    
+        {% call cached_fragment('checkpoints') %} ... {% endcall %}
+    
+    Only wrap markup that depends on stored data alone (not on the request).
+    """
+    version = (get_data_version(), date.today())
+    if fragment_cache['key'] != version:
+        fragment_cache['fragments'] = {}
+        fragment_cache['key'] = version
+    fragments = fragment_cache['fragments']
+    key = (name, keys)
+    if key not in fragments:
+        fragments[key] = Markup(caller())
+    return fragments[key]
+
 # JSON API Routes
 @app.route('/api/balance', methods=['POST'])
 def api_update_balance():
@@ -460,14 +480,7 @@ def api_add_income():
         amount = float(data['amount'])
         date_received = datetime.strptime(data['date'], '%Y-%m-%d').date()
         
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO income (source, amount, date_received, status)
-            VALUES (?, ?, ?, 'received')
-        ''', (source, amount, date_received))
-        conn.commit()
-        conn.close()
+        add_received_income(source, amount, date_received)
         
         return jsonify({'success': True, 'message': 'Contribution recorded'})
     except Exception as e:
@@ -624,6 +637,7 @@ def api_settings():
         try:
             data = request.get_json()
             update_settings(data)
+            checkpoint_schedule.cache_clear()
             return jsonify({'success': True, 'message': 'Settings updated'})
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)})
@@ -700,6 +714,125 @@ def api_category(cat_id):
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)})
 
+# Frequencies iter_recurrence_dates understands
+RECURRING_INCOME_FREQUENCIES = ('weekly', 'bi-weekly', 'monthly')
+
+def batch_date(value):
+    """Parse a YYYY-MM-DD batch value (empty stays None)"""
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+def batch_day_of_month(value):
+    """Validate a 1-31 day of month (empty stays None)"""
+    if value in (None, ''):
+        return None
+    day = int(value)
+    if not 1 <= day <= 31:
+        raise ValueError(f'Invalid day_of_month: {value}')
+    return day
+
+def batch_frequency(value):
+    """Validate a recurring income frequency"""
+    if value not in RECURRING_INCOME_FREQUENCIES:
+        raise ValueError(f'Invalid frequency: {value}')
+    return value
+
+def batch_fields(d, **converters):
+    """The fields of `d` that have a converter, converted (bad values raise)"""
+    return {key: convert(d[key]) for key, convert in converters.items() if key in d}
+
+# Batch operations: table -> {op: handler(item_id, data)}; creates return the new id
+BATCH_HANDLERS = {
+    'bills': {
+        'create': lambda _, d: add_bill(
+            d['name'], d['category'], float(d['amount']),
+            int(d['due_day']) if d.get('due_day') else None, d.get('frequency', 'monthly'),
+            bool(d.get('autopay', False)), d.get('due_date')),
+        'update': lambda item_id, d: update_bill(
+            item_id, name=d.get('name'), emoji=d.get('emoji'),
+            amount=float(d['amount']) if d.get('amount') is not None else None,
+            due_day=int(d['due_day']) if d.get('due_day') is not None else None,
+            frequency=d.get('frequency'), status=d.get('status'),
+            autopay=d['autopay'] in (True, 1, '1') if 'autopay' in d else None),
+        'delete': lambda item_id, _: delete_bill(item_id),
+    },
+    'credit_accounts': {
+        'create': lambda _, d: add_credit_account(
+            d['name'], d['account_type'], float(d.get('balance', 0)),
+            float(d['limit']) if d.get('limit') else None, float(d.get('min_payment', 0)),
+            float(d.get('apr', 0)), int(d.get('cycle_close_day', 1)), int(d.get('payment_due_day', 1))),
+        'update': lambda item_id, d: update_credit_account(
+            item_id, name=d.get('name'), emoji=d.get('emoji'),
+            balance=float(d['balance']) if d.get('balance') is not None else None,
+            limit=float(d['limit']) if d.get('limit') is not None else None,
+            min_payment=float(d['min_payment']) if d.get('min_payment') is not None else None,
+            apr=float(d['apr']) if d.get('apr') is not None else None,
+            cycle_close_day=int(d['cycle_close_day']) if d.get('cycle_close_day') else None,
+            payment_due_day=int(d['payment_due_day']) if d.get('payment_due_day') else None),
+        'delete': lambda item_id, _: delete_credit_account(item_id),
+    },
+    'income': {
+        'create': lambda _, d: (
+            add_received_income(d.get('source', 'Mom Contribution'), float(d['amount']), batch_date(d['date']))
+            if d.get('status', 'received') == 'received' else
+            add_income(d['source'], float(d['amount']), batch_date(d['date']), d['status'])),
+        'update': lambda item_id, d: update_income(item_id, **batch_fields(
+            d, source=str, amount=float, date_received=batch_date, date_expected=batch_date,
+            status=str, notes=str)),
+        'delete': lambda item_id, _: delete_income(item_id),
+    },
+    'recurring_income': {
+        'create': lambda _, d: add_recurring_income(
+            d['source'], float(d['amount']), batch_frequency(d['frequency']), batch_date(d['start_date']),
+            batch_date(d.get('end_date')), batch_day_of_month(d.get('day_of_month')), d.get('notes', '')),
+        'update': lambda item_id, d: update_recurring_income(item_id, **batch_fields(
+            d, source=str, amount=float, frequency=batch_frequency, start_date=batch_date,
+            end_date=batch_date, day_of_month=batch_day_of_month, notes=str, active=int)),
+        'delete': lambda item_id, _: delete_recurring_income(item_id),
+    },
+    'past_due_instances': {
+        'create': lambda _, d: add_past_due_instance(
+            d.get('bill_id'), d.get('credit_account_id'), d['period'], float(d['amount'])),
+        'delete': lambda item_id, _: delete_past_due_instance(item_id),
+    },
+}
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Apply a list of create/update/delete operations in one transaction
+    
+    Body: {"operations": [{"op": "update", "table": "bills", "id": 3, "data": {...}}, ...]}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('operations', []), list):
+        return jsonify({'success': False, 'message': 'Body must be an object with an "operations" list'})
+    operations = data.get('operations', [])
+    results = []
+    index = 0
+    try:
+        with transaction():
+            for index, operation in enumerate(operations):
+                if not isinstance(operation, dict):
+                    raise ValueError('Operation must be an object')
+                handlers = BATCH_HANDLERS.get(operation.get('table'))
+                if handlers is None:
+                    raise ValueError(f"Unknown table '{operation.get('table')}'")
+                handler = handlers.get(operation.get('op'))
+                if handler is None:
+                    raise ValueError(f"Unsupported operation '{operation.get('op')}' for {operation['table']}")
+                if operation['op'] != 'create' and operation.get('id') is None:
+                    raise ValueError('Missing id')
+                if operation['op'] != 'create' and not row_exists(operation['table'], operation['id']):
+                    raise ValueError(f"No {operation['table']} row with id {operation['id']}")
+                
+                result = handler(operation.get('id'), operation.get('data') or {})
+                results.append({
+                    'index': index,
+                    'id': result if operation['op'] == 'create' else operation['id']
+                })
+        return jsonify({'success': True, 'count': len(results), 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Operation {index} failed, nothing was saved: {str(e)}'})
+
 @app.route('/api/batch/mark-period-paid', methods=['POST'])
 def api_mark_period_paid():
     try:
@@ -726,51 +859,64 @@ def api_reset_monthly():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+EXPORT_BATCH_SIZE = 500
+
+# Bookkeeping and derived tables, rebuilt automatically so never exported
+INTERNAL_TABLES = ('sqlite_sequence', 'data_generation', 'change_log',
+                   'payment_monthly_totals', 'payment_category_totals', 'income_monthly_totals',
+                   'property_monthly_totals', 'bill_autopay_totals', 'bill_occurrences',
+                   'bill_occurrence_horizon', 'bill_occurrences_stale')
+
+def iter_full_export():
+    """Yield the full database export as CSV text, one batch of rows at a time"""
+    import csv
+    from io import StringIO
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # Get all table names
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    tables = [table[0] for table in cursor.fetchall()]
+    
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    
+    for table_name in tables:
+        if table_name in INTERNAL_TABLES:
+            continue  # Internal bookkeeping, rebuilt automatically
+        
+        # Write table separator
+        yield f"\n=== TABLE: {table_name} ===\n"
+        
+        cursor.execute(f"SELECT * FROM {table_name}")
+        rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+        if rows:
+            # Get column names
+            writer.writerow([description[0] for description in cursor.description])
+        
+        while rows:
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+    
+    conn.close()
+
 @app.route('/api/export/<data_type>', methods=['GET'])
 def api_export(data_type):
     import csv
     from io import StringIO
-    from flask import Response
+    from flask import Response, stream_with_context
     
     try:
         output = StringIO()
         
         if data_type == 'full':
-            # Export ENTIRE database - all tables
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            # Get all table names
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = cursor.fetchall()
-            
-            for table in tables:
-                table_name = table[0]
-                if table_name == 'sqlite_sequence':
-                    continue
-                
-                # Write table separator
-                output.write(f"\n=== TABLE: {table_name} ===\n")
-                
-                # Get all data from table
-                cursor.execute(f"SELECT * FROM {table_name}")
-                rows = cursor.fetchall()
-                
-                if rows:
-                    # Get column names
-                    columns = [description[0] for description in cursor.description]
-                    
-                    # Write as CSV
-                    writer = csv.writer(output)
-                    writer.writerow(columns)
-                    for row in rows:
-                        writer.writerow(row)
-                
-            conn.close()
-            
-            output.seek(0)
+            # Export ENTIRE database - all tables, streamed table by table
             return Response(
-                output.getvalue(),
+                stream_with_context(iter_full_export()),
                 mimetype='text/csv',
                 headers={'Content-Disposition': 'attachment;filename=full_database_export.csv'}
             )
@@ -808,15 +954,24 @@ def api_export(data_type):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+IMPORT_BATCH_SIZE = 1000
+
+IMPORT_TABLES = ['bills', 'credit_accounts', 'income', 'recurring_income',
+                 'categories', 'past_due_instances', 'property_transactions',
+                 'tax_obligations', 'property_unit_status',
+                 'property_repair_estimates', 'property_income_projections', 'bank_transactions',
+                 'credit_payment_overrides', 'payment_history']
+
 @app.route('/api/import', methods=['POST'])
 def api_import():
     """Import CSV data with transaction handling and duplicate detection"""
     import csv
-    from io import StringIO
+    import io
     
     try:
+        started = perf_counter()
         file = request.files['file']
-        content = file.read().decode('utf-8')
+        reader = csv.reader(io.TextIOWrapper(file.stream, encoding='utf-8', newline=''))
         
         conn = get_connection()
         cursor = conn.cursor()
@@ -824,79 +979,84 @@ def api_import():
         # Begin transaction
         cursor.execute('BEGIN TRANSACTION')
         
+        # Names already in the database, for duplicate detection without per-row lookups
+        existing_names = {
+            'bills': {row[0] for row in cursor.execute('SELECT name FROM bills')},
+            'categories': {row[0] for row in cursor.execute('SELECT name FROM categories')}
+        }
+        
         current_table = None
         columns = None
+        batch = []
         imported_count = 0
         skipped_count = 0
         
-        for line in content.split('\n'):
-            if line.startswith('=== TABLE:'):
-                current_table = line.replace('=== TABLE:', '').replace('===', '').strip()
+        def flush():
+            """Insert the pending rows for the current table with one executemany"""
+            nonlocal imported_count, skipped_count
+            if not batch:
+                return
+            if current_table == 'account_balance':
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO account_balance (id, balance, cushion, last_updated)
+                    VALUES (?, ?, ?, ?)
+                ''', [values[:4] for values in batch])
+                imported_count += len(batch)
+            elif current_table == 'user_settings':
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO user_settings 
+                    (id, monthly_income, cushion_amount, checkpoint_mode, checkpoint_count, 
+                     custom_checkpoint_days, nys_payroll_start_date, dark_mode, last_updated)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [values[:9] for values in batch])
+                imported_count += len(batch)
+            else:
+                # OR IGNORE skips duplicate or constraint-violating rows
+                placeholders = ','.join(['?' for _ in columns])
+                cursor.executemany(
+                    f"INSERT OR IGNORE INTO {current_table} ({','.join(columns)}) VALUES ({placeholders})",
+                    batch)
+                inserted = cursor.rowcount
+                imported_count += inserted
+                skipped_count += len(batch) - inserted
+            batch.clear()
+        
+        for values in reader:
+            if values and values[0].startswith('=== TABLE:'):
+                flush()
+                current_table = values[0].replace('=== TABLE:', '').replace('===', '').strip()
                 columns = None
-            elif current_table and line.strip():
+            elif current_table and any(value.strip() for value in values):
                 if not columns:
-                    columns = line.strip().split(',')
-                else:
-                    values = list(csv.reader(StringIO(line)))[0] if line.strip() else []
-                    if not values:
-                        continue
-                    
-                    # Handle each table with appropriate logic
-                    if current_table == 'account_balance':
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO account_balance (id, balance, cushion, last_updated)
-                            VALUES (?, ?, ?, ?)
-                        ''', values[:4])
-                        imported_count += 1
-                        
-                    elif current_table == 'user_settings':
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO user_settings 
-                            (id, monthly_income, cushion_amount, checkpoint_mode, checkpoint_count, 
-                             custom_checkpoint_days, nys_payroll_start_date, dark_mode, last_updated)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', values[:9])
-                        imported_count += 1
-                        
-                    elif current_table in ['bills', 'credit_accounts', 'income', 'recurring_income', 
-                                          'categories', 'past_due_instances', 'property_transactions',
-                                          'tax_obligations', 'property_unit_status', 
-                                          'property_repair_estimates', 'property_income_projections',
-                                          'credit_payment_overrides']:
-                        # Check for duplicates before inserting
-                        if current_table == 'bills' and len(values) > 1:
-                            # Check if bill with same name exists
-                            cursor.execute('SELECT id FROM bills WHERE name = ?', (values[1],))
-                            if cursor.fetchone():
-                                skipped_count += 1
-                                continue
-                        
-                        if current_table == 'categories' and len(values) > 1:
-                            # Check if category with same name exists
-                            cursor.execute('SELECT id FROM categories WHERE name = ?', (values[1],))
-                            if cursor.fetchone():
-                                skipped_count += 1
-                                continue
-                        
-                        # Insert with IGNORE to skip duplicates
-                        placeholders = ','.join(['?' for _ in values])
-                        try:
-                            cursor.execute(f"INSERT INTO {current_table} ({','.join(columns)}) VALUES ({placeholders})", values)
-                            imported_count += 1
-                        except sqlite3.IntegrityError:
-                            # Duplicate or constraint violation, skip
+                    columns = [column.strip() for column in values]
+                elif current_table in ('account_balance', 'user_settings') or current_table in IMPORT_TABLES:
+                    # Check for duplicate bill/category names before inserting
+                    if current_table in existing_names and len(values) > 1:
+                        if values[1] in existing_names[current_table]:
                             skipped_count += 1
                             continue
+                        existing_names[current_table].add(values[1])
+                    
+                    batch.append(values)
+                    if len(batch) >= IMPORT_BATCH_SIZE:
+                        flush()
+        flush()
         
         # Commit transaction
         conn.commit()
         conn.close()
         
+        elapsed = perf_counter() - started
+        total_rows = imported_count + skipped_count
         message = f'Import successful! {imported_count} records imported'
         if skipped_count > 0:
             message += f', {skipped_count} duplicates skipped'
+        if elapsed > 0:
+            message += f' ({total_rows / elapsed:,.0f} rows/sec)'
         
-        return jsonify({'success': True, 'message': message})
+        return jsonify({'success': True, 'message': message,
+                        'imported': imported_count, 'skipped': skipped_count,
+                        'rows_per_second': round(total_rows / elapsed) if elapsed > 0 else None})
         
     except Exception as e:
         # Rollback on error
@@ -907,6 +1067,52 @@ def api_import():
             pass
         return jsonify({'success': False, 'message': f'Import failed: {str(e)}'})
 
+# ==================== BANK STATEMENT IMPORT ====================
+
+@app.route('/api/import/statement', methods=['POST'])
+def api_import_statement():
+    """Import a bank or card statement (CSV, OFX or QFX), skipping transactions already imported
+    
+    Form fields: file, optional account (label for CSV files; OFX files
+    carry their own account id) and format ('csv' or 'ofx', else detected).
+    """
+    import io
+    
+    try:
+        started = perf_counter()
+        file = request.files['file']
+        file_format = request.form.get('format') or detect_format(file.filename, file.stream.read(512))
+        file.stream.seek(0)
+        stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', errors='replace', newline='')
+        
+        imported, skipped = import_bank_transactions(
+            iter_statement(stream, file_format, request.form.get('account', '')), IMPORT_BATCH_SIZE)
+        
+        elapsed = perf_counter() - started
+        message = f'Statement imported! {imported} transactions added'
+        if skipped:
+            message += f', {skipped} already imported'
+        return jsonify({'success': True, 'message': message, 'format': file_format,
+                        'imported': imported, 'skipped': skipped,
+                        'rows_per_second': round((imported + skipped) / elapsed) if elapsed > 0 else None})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Import failed: {str(e)}'})
+
+@app.route('/api/transactions')
+def api_transactions():
+    """Imported bank transactions, newest first (?start=&end=YYYY-MM-DD, ?limit=)"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        limit = min(max(request.args.get('limit', 500, type=int), 1), 10000)
+        transactions = get_bank_transactions(
+            datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+            datetime.strptime(end, '%Y-%m-%d').date() if end else None,
+            limit)
+        return jsonify({'success': True, 'transactions': transactions})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 # ==================== V6.4: CREDIT PAYMENT OVERRIDE ENDPOINTS ====================
 
 @app.route('/api/credit/<int:credit_id>/payment-override', methods=['GET', 'POST', 'DELETE'])
@@ -1029,54 +1235,471 @@ def property_projection(month, year):
 
 @app.route('/api/large-expenses')
 def large_expenses():
-    """Get upcoming expenses > $500 in next 90 days"""
-    from datetime import timedelta
-    today = date.today()
-    end_date = today + timedelta(days=90)
+    """Upcoming bills, credit minimums and taxes over ?threshold= (default $500) in the next ?days= (default 90)
     
-    large_expenses = []
+    The window is clamped to the materialized occurrence horizon.
+    """
+    try:
+        threshold = request.args.get('threshold', 500, type=float)
+        today = date.today()
+        end_date = today + timedelta(days=max(request.args.get('days', 90, type=int), 0))
+        horizon = get_bill_occurrence_horizon()
+        if horizon:
+            end_date = min(max(end_date, today), horizon[1])
+        days = (end_date - today).days
+        
+        expenses = [{
+            'type': item['type'],
+            'id': item['id'],
+            'name': item['name'],
+            'amount': item['amount'],
+            'due_date': item['due_date'].isoformat(),
+            'days_until': (item['due_date'] - today).days
+        } for item in get_upcoming_obligations(today, end_date, threshold)]
+        
+        return jsonify({'success': True, 'threshold': threshold, 'days': days,
+                        'end': end_date.isoformat(), 'expenses': expenses})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== LIVE CHANGE FEED ====================
+
+EVENT_BATCH_SIZE = 200
+EVENT_KEEPALIVE_SECONDS = 15
+
+@app.route('/api/events')
+def api_events():
+    """Server-Sent Events stream of changed rows
     
-    # Check bills
-    bills = get_all_bills()
-    for bill in bills:
-        if bill['amount'] > 500:
-            # Calculate next due date
-            if bill['frequency'] == 'annual':
-                # Add annual bills if within window
-                if bill.get('due_date'):
-                    due = datetime.strptime(bill['due_date'], '%Y-%m-%d').date()
-                    if today <= due <= end_date:
-                        large_expenses.append({
-                            'type': 'bill',
-                            'name': f"{bill.get('emoji', '📄')} {bill['name']}",
-                            'amount': bill['amount'],
-                            'due_date': due.isoformat(),
-                            'days_until': (due - today).days
-                        })
+    Each client only keeps its position in change_log, so a slow client
+    costs one batch of rows at a time; one that falls behind the retained
+    log gets a `resync` event and should reload.
+    """
+    from flask import Response, stream_with_context
+    import json
     
-    # Check taxes
-    taxes = get_all_taxes()
-    for tax in taxes:
-        if tax['amount_due'] > 500 and tax['status'] != 'paid':
-            due = datetime.strptime(tax['due_date'], '%Y-%m-%d').date()
-            if today <= due <= end_date:
-                large_expenses.append({
-                    'type': 'tax',
-                    'name': f"💰 {tax['tax_type']}",
-                    'amount': tax['amount_due'],
-                    'due_date': due.isoformat(),
-                    'days_until': (due - today).days
-                })
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    last_id = last_event_id if last_event_id is not None else get_change_log_position()
     
-    # Sort by due date
-    large_expenses.sort(key=lambda x: x['due_date'])
+    def stream():
+        nonlocal last_id
+        yield 'retry: 3000\n\n'
+        while True:
+            changes, last_id, resync = get_changes_since(last_id, EVENT_BATCH_SIZE)
+            if resync:
+                yield f"id: {last_id}\nevent: resync\ndata: {{}}\n\n"
+            elif changes:
+                payload = json.dumps({'version': get_data_version(), 'changes': changes},
+                                     separators=(',', ':'), default=str)
+                yield f"id: {last_id}\nevent: change\ndata: {payload}\n\n"
+                continue  # Drain any remaining backlog before waiting
+            # Wake on local commits; the timeout also picks up other processes' writes
+            if not wait_for_changes(EVENT_KEEPALIVE_SECONDS):
+                yield ': keepalive\n\n'
+    
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# ==================== CHECKPOINT SCHEDULE ====================
+
+@app.route('/api/checkpoints')
+def api_checkpoints():
+    """Future checkpoint dates for long-range planning"""
+    try:
+        count = min(max(request.args.get('count', 100, type=int), 1), 10000)
+        start = request.args.get('start')
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        checkpoints = calculate_checkpoints(count, request.args.get('mode'),
+                                            request.args.get('days'), start_date)
+        return jsonify({'success': True, 'checkpoints': [c.isoformat() for c in checkpoints]})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== BILLS DUE ====================
+
+@app.route('/api/bills/due')
+def api_bills_due():
+    """Bill occurrences due in ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: next 30 days)
+    
+    The range is clamped to the materialized occurrence horizon.
+    """
+    try:
+        start = request.args.get('start')
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else date.today()
+        end = request.args.get('end')
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else start_date + timedelta(days=30)
+        horizon = get_bill_occurrence_horizon()
+        if horizon:
+            start_date = min(max(start_date, horizon[0]), horizon[1])
+            end_date = min(max(end_date, start_date), horizon[1])
+        bills = get_bills_for_period(start_date, end_date)
+        return jsonify({
+            'success': True,
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'bills': to_json_value(bills),
+            'total': round(sum(bill['amount'] for bill in bills), 2)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== CASH-FLOW FORECAST ====================
+
+@app.route('/api/forecast')
+def api_forecast():
+    """Projected balances over a horizon (default 5 years)"""
+    try:
+        days = min(max(request.args.get('days', 1826, type=int), 1), 36525)
+        threshold = request.args.get('threshold', 0.0, type=float)
+        timeline = build_timeline(load_checkpoint_snapshot(), date.today(), days)
+        
+        low_date, low_balance = timeline.lowest_balance()
+        shortfall = timeline.first_shortfall(threshold)
+        return jsonify({
+            'success': True,
+            'start': timeline.start.isoformat(),
+            'end': timeline.end.isoformat(),
+            'opening_balance': round(timeline.opening_balance, 2),
+            'closing_balance': round(timeline.balance_on(timeline.end), 2),
+            'lowest_balance': round(low_balance, 2),
+            'lowest_balance_date': low_date.isoformat(),
+            'first_shortfall_date': shortfall.isoformat() if shortfall else None,
+            'months': monthly_summary(timeline) if request.args.get('months') != '0' else None
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== WHAT-IF SCENARIOS ====================
+
+def summarize_checkpoints(checkpoints):
+    """Per-checkpoint totals (without the bill and paycheck lists)"""
+    return [{
+        'date': checkpoint['date'].isoformat(),
+        'total_bills': round(checkpoint['total_bills'], 2),
+        'period_income': round(checkpoint['period_income'], 2),
+        'mom_needs': round(checkpoint['mom_needs'], 2),
+        'status': checkpoint['status']
+    } for checkpoint in checkpoints]
+
+def summarize_timeline(snapshot, days):
+    """Lowest projected balance (after the cushion) and first shortfall for a snapshot"""
+    timeline = build_timeline(snapshot, date.today(), days)
+    low_date, low_balance = timeline.lowest_balance()
+    shortfall = timeline.first_shortfall()
+    return {
+        'lowest_balance': round(low_balance, 2),
+        'lowest_balance_date': low_date.isoformat(),
+        'first_shortfall_date': shortfall.isoformat() if shortfall else None,
+        'closing_balance': round(timeline.balance_on(timeline.end), 2)
+    }
+
+@app.route('/api/scenarios', methods=['POST'])
+def api_scenarios():
+    """Evaluate what-if scenarios side by side, without writing anything
+    
+    Body: {"scenarios": [{"name": "Rent +200", "overrides": [...]}, ...],
+    "days": 365} (override forms are documented in scenario.py). Every
+    scenario is compared with the baseline computed from the same snapshot:
+    checkpoint mom_needs, plus the projected balance over `days`, which is
+    where account balance and cushion changes show up.
+    """
+    try:
+        data = request.get_json() or {}
+        days = min(max(int(data.get('days', 365)), 1), 36525)
+        base = load_checkpoint_snapshot()
+        baseline = summarize_checkpoints(calculate_checkpoint_requirements(base))
+        baseline_needs = sum(c['mom_needs'] for c in baseline)
+        baseline_timeline = summarize_timeline(base, days)
+        
+        results = []
+        for i, scenario in enumerate(data.get('scenarios', [])):
+            snapshot = apply_overrides(base, scenario.get('overrides', []))
+            checkpoints = summarize_checkpoints(calculate_checkpoint_requirements(snapshot))
+            total_needs = sum(c['mom_needs'] for c in checkpoints)
+            for checkpoint, before in zip(checkpoints, baseline):
+                checkpoint['mom_needs_change'] = round(checkpoint['mom_needs'] - before['mom_needs'], 2)
+            timeline = summarize_timeline(snapshot, days)
+            results.append({
+                'name': scenario.get('name') or f'Scenario {i + 1}',
+                'checkpoints': checkpoints,
+                'total_mom_needs': round(total_needs, 2),
+                'total_mom_needs_change': round(total_needs - baseline_needs, 2),
+                'timeline': timeline,
+                'lowest_balance_change': round(timeline['lowest_balance'] - baseline_timeline['lowest_balance'], 2)
+            })
+        
+        return jsonify({
+            'success': True,
+            'days': days,
+            'baseline': {'checkpoints': baseline, 'total_mom_needs': round(baseline_needs, 2),
+                         'timeline': baseline_timeline},
+            'scenarios': results
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== CHECKPOINT RISK ====================
+
+@app.route('/api/risk', methods=['GET', 'POST'])
+def api_risk():
+    """Monte Carlo shortfall probability for each checkpoint
+    
+    Optional JSON body: paths (default 5000), budget_ms (default 2000),
+    category_variance ({category: cv}), income_variance (cv or {source: cv}),
+    seed, and scenario overrides (see scenario.py).
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        paths = min(max(int(data.get('paths', request.args.get('paths', 5000))), 1), 200000)
+        budget_ms = min(max(int(data.get('budget_ms', request.args.get('budget_ms', 2000))), 50), 30000)
+        
+        snapshot = load_checkpoint_snapshot()
+        if data.get('overrides'):
+            snapshot = apply_overrides(snapshot, data['overrides'])
+        checkpoints = calculate_checkpoint_requirements(snapshot)
+        plan = build_risk_plan(checkpoints, data.get('category_variance'), data.get('income_variance'))
+        
+        started = perf_counter()
+        samples, completed, cut_short = run_risk_analysis(plan, paths, budget_ms / 1000, data.get('seed'))
+        
+        results = []
+        for checkpoint, needs in zip(checkpoints, samples):
+            summary = summarize_window(needs)
+            p95 = summary['p95_mom_needs']
+            results.append(dict(
+                summary,
+                date=checkpoint['date'].isoformat(),
+                mom_needs=round(checkpoint['mom_needs'], 2),
+                status=checkpoint['status'],
+                risk_status=None if p95 is None else 'good' if p95 == 0 else 'warning' if p95 < 1000 else 'critical'
+            ))
+        
+        return jsonify({
+            'success': True,
+            'paths': completed,
+            'paths_requested': paths,
+            'budget_exhausted': cut_short,
+            'elapsed_ms': round((perf_counter() - started) * 1000, 1),
+            'checkpoints': results
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== CREDIT PAYOFF SIMULATOR ====================
+
+@app.route('/api/credit/payoff')
+def api_credit_payoff():
+    """Payoff projections for all cards and loans under each strategy
     
-    return jsonify({'success': True, 'expenses': large_expenses})
+    ?strategies=minimum,avalanche,snowball&extra=0,100,250&months=360&detail=1
+    Minimum-only ignores extra; the others run once per extra amount.
+    """
+    try:
+        strategies = [s for s in request.args.get('strategies', ','.join(STRATEGIES)).split(',') if s]
+        unknown = set(strategies) - set(STRATEGIES)
+        if unknown:
+            raise ValueError(f"Unknown strategy: {', '.join(sorted(unknown))}")
+        extras = [float(x) for x in request.args.get('extra', '0').split(',') if x] or [0.0]
+        months = min(max(request.args.get('months', MAX_MONTHS, type=int), 1), 1200)
+        
+        variants = [(strategy, 0.0 if strategy == 'minimum' else extra)
+                    for strategy in strategies
+                    for extra in (extras if strategy != 'minimum' else [0.0])]
+        results = simulate_payoff(get_all_credit_accounts(), variants, months,
+                                  detail=request.args.get('detail') == '1')
+        return jsonify({'success': True, 'months': months, 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== PAYMENT LEDGER ====================
+
+@app.route('/api/payments')
+def api_payments():
+    """Ledger entries, newest first (?limit=, then ?before_id= for the next page)"""
+    try:
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        payments = get_payment_history(limit, request.args.get('before_id', type=int))
+        return jsonify({
+            'success': True,
+            'payments': payments,
+            'next_before_id': payments[-1]['id'] if len(payments) == limit else None
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/payments', methods=['POST'])
+def api_record_payment():
+    """Append a payment to the ledger (a negative amount reverses an earlier one)"""
+    try:
+        data = request.get_json()
+        amount = float(data['amount'])
+        payment_date = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else date.today()
+        payment_id = record_payment(amount, payment_date, data.get('bill_id'), data.get('credit_account_id'),
+                                    data.get('category'), data.get('notes'))
+        return jsonify({'success': True, 'id': payment_id})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== ANALYTICS ====================
+
+def analytics_months():
+    """Month range from ?start=YYYY-MM&end=YYYY-MM, or the last ?months= (default 12)"""
+    today = date.today()
+    end = request.args.get('end') or today.strftime('%Y-%m')
+    start = request.args.get('start')
+    if not start:
+        months = min(max(request.args.get('months', 12, type=int), 1), 1200)
+        year, month = map(int, end.split('-'))
+        index = year * 12 + month - months
+        start = f'{index // 12:04d}-{index % 12 + 1:02d}'
+    
+    labels = []
+    year, month = map(int, start.split('-'))
+    while f'{year:04d}-{month:02d}' <= end:
+        labels.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return start, end, labels
+
+def outflow_by_category(start, end):
+    months = {}
+    for row in get_outflow_by_category(start, end):
+        months.setdefault(row['month'], {})[row['category']] = round(row['total'], 2)
+    return [{'month': month, 'categories': categories} for month, categories in months.items()]
+
+def spending_by_category(start, end):
+    return [dict(row, total=round(row['total'], 2)) for row in get_spending_by_category(start, end)]
+
+def income_vs_bills(start, end, labels):
+    income, payments = get_income_vs_bills(start, end)
+    return [{
+        'month': month,
+        'income': round(income.get(month, 0), 2),
+        'bills': round(payments.get(month, 0), 2),
+        'net': round(income.get(month, 0) - payments.get(month, 0), 2)
+    } for month in labels]
+
+def autopay_share():
+    share = get_autopay_share()
+    total = sum(row['total'] for row in share.values())
+    result = {}
+    for autopay, key in ((True, 'autopay'), (False, 'manual')):
+        row = share.get(autopay, {'total': 0, 'row_count': 0})
+        result[key] = {
+            'count': row['row_count'],
+            'amount': round(row['total'], 2),
+            'share': round(row['total'] / total, 4) if total else 0
+        }
+    return result
+
+def property_net(start, end):
+    return [{key: round(value, 2) if key != 'month' else value for key, value in row.items()}
+            for row in get_property_net_by_month(start, end)]
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Every analytics series for the requested month range"""
+    try:
+        start, end, labels = analytics_months()
+        return jsonify({
+            'success': True,
+            'start': start,
+            'end': end,
+            'outflow_by_category': outflow_by_category(start, end),
+            'spending_by_category': spending_by_category(start, end),
+            'income_vs_bills': income_vs_bills(start, end, labels),
+            'autopay_share': autopay_share(),
+            'property_net': property_net(start, end)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/analytics/outflow-by-category')
+def api_analytics_outflow():
+    """Bill payments per month, split by category"""
+    try:
+        start, end, labels = analytics_months()
+        return jsonify({'success': True, 'months': outflow_by_category(start, end)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/analytics/spending-by-category')
+def api_analytics_spending_by_category():
+    """Bill payments per category over the whole range, largest first"""
+    try:
+        start, end, labels = analytics_months()
+        return jsonify({'success': True, 'categories': spending_by_category(start, end)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/analytics/income-vs-bills')
+def api_analytics_income_vs_bills():
+    """Received income against bill payments, month by month"""
+    try:
+        start, end, labels = analytics_months()
+        return jsonify({'success': True, 'months': income_vs_bills(start, end, labels)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/analytics/autopay-share')
+def api_analytics_autopay_share():
+    """How much of the bill load is on autopay"""
+    try:
+        return jsonify({'success': True, **autopay_share()})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/analytics/property-net')
+def api_analytics_property_net():
+    """Property income, expenses and net per month"""
+    try:
+        start, end, labels = analytics_months()
+        return jsonify({'success': True, 'months': property_net(start, end)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== STARTUP & HEALTH ====================
+
+def prepare_app():
+    """One-time startup work: schema init/migrations and cache warm-up
+    
+    Run once in the parent process before a pre-forking server starts its
+    workers, so they inherit compiled templates and warm caches.
+    """
+    init_database()
+    release_connection()
+    
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+    
+    # Rendering the cached pages fills the dashboard context, checkpoint
+    # schedule and template fragment caches
+    client = app.test_client()
+    for path in ('/', '/bills'):
+        client.get(path)
+
+@app.route('/healthz')
+def healthz():
+    """Liveness/readiness check: the database answers a query"""
+    try:
+        return jsonify({'status': 'ok', 'data_version': get_data_version()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+
+# ==================== DEBUG: REQUEST PROFILES ====================
+
+@app.route('/api/debug/profile')
+def api_debug_profile():
+    """Slowest recently profiled requests (requires FINANCE_PROFILE=1)"""
+    if not app.config['PROFILE']:
+        return jsonify({'success': False, 'message': 'Profiling disabled, set FINANCE_PROFILE=1'})
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    slowest = sorted(recent_profiles, key=lambda p: p['total_ms'], reverse=True)[:limit]
+    return jsonify({'success': True, 'recorded': len(recent_profiles), 'requests': slowest})
 
 if __name__ == '__main__':
     # Initialize database if it doesn't exist
     if not os.path.exists(DATABASE_NAME):
         print("Database not found. Please run populate_data.py first!")
     else:
-        init_database()  # Ensure V6 tables exist
+        prepare_app()  # Ensure V6 tables exist and warm caches
         app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,214 @@
+"""ASGI entry point: run the Flask app under an async server
+
+    pip install uvicorn
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+Importing this module runs prepare_app() (schema init/migrations and cache
+warm-up), as wsgi.py does.
+
+Requests are handed to bounded thread pools, so SQLite work never blocks the
+event loop. Long-running requests (export, import, risk analysis) use their
+own pool and can't starve dashboard reads. Live event streams hold a thread
+for as long as the client stays connected, so they get a third pool and
+can't starve long requests either. Each request runs entirely on one pool
+thread, which keeps the thread-local database connection valid for its
+whole lifetime, including streamed bodies. Request bodies are streamed too:
+wsgi.input pulls chunks from the server as the app reads them, so an upload
+is never held in memory whole.
+
+Pool sizes: FINANCE_READ_WORKERS (default 8), FINANCE_LONG_WORKERS (default 4),
+FINANCE_STREAM_WORKERS (default 16, the most concurrent event streams).
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app as flask_app, prepare_app
+
+# Path prefixes served from the long-request pool
+LONG_PATHS = ('/api/export', '/api/import', '/api/risk')
+
+# Path prefixes of streaming responses, served from the stream pool
+STREAM_PATHS = ('/api/events',)
+
+# Response chunks buffered per request before the worker thread waits
+RESPONSE_QUEUE_SIZE = 8
+
+# Request body chunks received ahead of the app reading them
+REQUEST_QUEUE_SIZE = 4
+
+class ClientDisconnected(Exception):
+    """The client went away while the response was still being produced"""
+
+class RequestBody(io.RawIOBase):
+    """Blocking wsgi.input that takes body chunks from the event loop as they are read"""
+
+    def __init__(self, loop, chunks):
+        self.loop = loop
+        self.chunks = chunks
+        self.pending = memoryview(b'')
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending and not self.finished:
+            chunk = asyncio.run_coroutine_threadsafe(self.chunks.get(), self.loop).result()
+            if chunk is None:
+                self.finished = True
+            else:
+                self.pending = memoryview(chunk)
+        count = min(len(buffer), len(self.pending))
+        buffer[:count] = self.pending[:count]
+        self.pending = self.pending[count:]
+        return count
+
+class ThreadPoolASGI:
+    """Serve a WSGI app over ASGI using bounded thread pools"""
+
+    def __init__(self, wsgi_app, read_workers=8, long_workers=4, stream_workers=16):
+        self.wsgi_app = wsgi_app
+        self.read_pool = ThreadPoolExecutor(read_workers, thread_name_prefix='finance-read')
+        self.long_pool = ThreadPoolExecutor(long_workers, thread_name_prefix='finance-long')
+        self.stream_pool = ThreadPoolExecutor(stream_workers, thread_name_prefix='finance-stream')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_pool.shutdown(wait=False)
+                self.long_pool.shutdown(wait=False)
+                self.stream_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=RESPONSE_QUEUE_SIZE)
+        chunks = asyncio.Queue(maxsize=REQUEST_QUEUE_SIZE)
+        disconnected = threading.Event()
+
+        async def watch_receive():
+            # Feed the body to wsgi.input (None marks its end), then wait for a disconnect
+            more_body = True
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    disconnected.set()
+                    if more_body:
+                        await chunks.put(None)
+                    return
+                if more_body:
+                    more_body = message.get('more_body', False)
+                    await chunks.put(message.get('body', b''))
+                    if not more_body:
+                        await chunks.put(None)
+        watcher = asyncio.ensure_future(watch_receive())
+
+        body = io.BufferedReader(RequestBody(loop, chunks))
+        pool = self.pool_for(scope['path'])
+        worker = loop.run_in_executor(pool, self.run_wsgi, self.build_environ(scope, body),
+                                      loop, queue, disconnected)
+
+        try:
+            while (message := await queue.get()) is not None:
+                if not disconnected.is_set():
+                    try:
+                        await send(message)
+                    except OSError:
+                        disconnected.set()
+            await worker
+        finally:
+            watcher.cancel()
+
+    def pool_for(self, path):
+        """The thread pool that serves requests for `path`"""
+        if path.startswith(STREAM_PATHS):
+            return self.stream_pool
+        if path.startswith(LONG_PATHS):
+            return self.long_pool
+        return self.read_pool
+
+    def run_wsgi(self, environ, loop, queue, disconnected):
+        """Run one request on a pool thread, passing messages back to the loop"""
+        def put(message):
+            if disconnected.is_set() and message is not None:
+                raise ClientDisconnected()
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        try:
+            result = self.wsgi_app(environ, start_response)
+            try:
+                put({'type': 'http.response.start', 'status': response['status'],
+                     'headers': response['headers']})
+                for chunk in result:
+                    if chunk:
+                        put({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                put({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        except ClientDisconnected:
+            pass
+        finally:
+            put(None)
+
+    def build_environ(self, scope, body):
+        """Translate an ASGI HTTP scope into a WSGI environ"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+            else:
+                key = f'HTTP_{name}'
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+prepare_app()
+
+app = ThreadPoolASGI(
+    flask_app,
+    read_workers=int(os.environ.get('FINANCE_READ_WORKERS', 8)),
+    long_workers=int(os.environ.get('FINANCE_LONG_WORKERS', 4)),
+    stream_workers=int(os.environ.get('FINANCE_STREAM_WORKERS', 16)),
+)
@@ -0,0 +1,232 @@
+"""Benchmark the app against synthetic large-household databases
+
+Usage:
+    python benchmark.py                      # all scales, report to benchmark_report.json
+    python benchmark.py --scales small --iterations 5 --output report.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import database
+
+SCALES = {
+    'small': {'bills': 200, 'credit_accounts': 20, 'income': 2000, 'payment_history': 5000,
+              'property_transactions': 1000, 'past_due_instances': 20, 'years': 2},
+    'medium': {'bills': 2000, 'credit_accounts': 50, 'income': 20000, 'payment_history': 50000,
+               'property_transactions': 10000, 'past_due_instances': 100, 'years': 5},
+    'large': {'bills': 10000, 'credit_accounts': 100, 'income': 100000, 'payment_history': 250000,
+              'property_transactions': 50000, 'past_due_instances': 500, 'years': 10},
+}
+
+ROUTES = ['/', '/bills', '/credit', '/property', '/api/export/full', '/api/large-expenses']
+
+BILL_CATEGORIES = ['Housing', 'Utilities', 'Phone/Internet', 'Subscriptions', 'Insurance',
+                   'Transportation', 'Food', 'Healthcare', 'Personal', 'Other']
+BILL_FREQUENCIES = ['monthly'] * 8 + ['bi-monthly', 'semi-annual', 'annual', 'one-time']
+
+def generate_database(path, scale, seed=42):
+    """Create a synthetic database at the given scale"""
+    rng = random.Random(seed)
+    sizes = SCALES[scale]
+    today = date.today()
+    history_start = today - timedelta(days=365 * sizes['years'])
+
+    def random_day(start, days):
+        return (start + timedelta(days=rng.randrange(days))).isoformat()
+
+    database.DATABASE_NAME = path
+    database.init_database()
+    conn = database.get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('INSERT OR REPLACE INTO account_balance (id, balance, cushion) VALUES (1, 2500.00, 500.00)')
+
+    bills = []
+    for i in range(sizes['bills']):
+        frequency = rng.choice(BILL_FREQUENCIES)
+        monthly = frequency == 'monthly'
+        bills.append((
+            f"Bill {i}", rng.choice(BILL_CATEGORIES), round(rng.uniform(10, 1500), 2),
+            rng.randint(1, 31) if monthly else None,
+            None if monthly else random_day(today - timedelta(days=30), 400),
+            frequency, rng.random() < 0.5, rng.choice(['pending', 'pending', 'paid', 'overdue'])
+        ))
+    cursor.executemany('''
+        INSERT INTO bills (name, category, amount, due_day, due_date, frequency, autopay, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', bills)
+
+    accounts = []
+    for i in range(sizes['credit_accounts']):
+        is_card = rng.random() < 0.85
+        limit = round(rng.uniform(300, 10000), 2) if is_card else None
+        balance = round(rng.uniform(0, limit), 2) if is_card else round(rng.uniform(5000, 250000), 2)
+        accounts.append((
+            f"Account {i}", 'credit_card' if is_card else 'loan', balance, limit,
+            round(max(25, balance * 0.03), 2), round(rng.uniform(4, 36), 2),
+            rng.randint(1, 28), rng.randint(1, 28)
+        ))
+    cursor.executemany('''
+        INSERT INTO credit_accounts
+        (name, account_type, current_balance, credit_limit, minimum_payment, apr, cycle_close_day, payment_due_day)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', accounts)
+
+    income = []
+    for i in range(sizes['income']):
+        if rng.random() < 0.9:
+            income.append((f"Source {i % 25}", round(rng.uniform(100, 3000), 2),
+                           random_day(history_start, 365 * sizes['years']), None, 'received'))
+        else:
+            income.append((f"Source {i % 25}", round(rng.uniform(100, 3000), 2),
+                           None, random_day(today, 180), 'expected'))
+    cursor.executemany('''
+        INSERT INTO income (source, amount, date_received, date_expected, status)
+        VALUES (?, ?, ?, ?, ?)
+    ''', income)
+
+    cursor.executemany('''
+        INSERT INTO recurring_income (source, amount, frequency, start_date, day_of_month)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [('Paycheck', 941.17, 'bi-weekly', history_start.isoformat(), None),
+          ('Side Job', 400.00, 'weekly', history_start.isoformat(), None),
+          ('Rent Income', 1200.00, 'monthly', history_start.isoformat(), 1)])
+
+    cursor.executemany('''
+        INSERT INTO payment_history (bill_id, amount, payment_date)
+        VALUES (?, ?, ?)
+    ''', [(rng.randint(1, sizes['bills']), round(rng.uniform(10, 1500), 2),
+           random_day(history_start, 365 * sizes['years'])) for _ in range(sizes['payment_history'])])
+
+    cursor.executemany('''
+        INSERT INTO property_transactions (transaction_type, description, amount, date, category)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(rng.choice(['income', 'expense']), f"Transaction {i}", round(rng.uniform(20, 2500), 2),
+           random_day(history_start, 365 * sizes['years']), rng.choice(['Rent', 'Repairs', 'Utilities', 'Taxes']))
+          for i in range(sizes['property_transactions'])])
+
+    cursor.executemany('''
+        INSERT INTO past_due_instances (bill_id, period, amount)
+        VALUES (?, ?, ?)
+    ''', [(rng.randint(1, sizes['bills']), f"{rng.randint(1, 12):02d}/{today.year}", round(rng.uniform(10, 500), 2))
+          for _ in range(sizes['past_due_instances'])])
+
+    cursor.executemany('''
+        INSERT INTO tax_obligations (tax_type, amount_due, due_date, status)
+        VALUES (?, ?, ?, ?)
+    ''', [(f"Tax {i}", round(rng.uniform(200, 6000), 2), random_day(today, 365), 'pending') for i in range(12)])
+
+    conn.commit()
+    database.release_connection()
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def time_request(client, method, url, **kwargs):
+    """Run one request, returning (milliseconds, peak bytes, status code)"""
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    response = getattr(client, method)(url, **kwargs)
+    response.get_data()  # Drain streamed responses
+    elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, tracemalloc.get_traced_memory()[1], response.status_code
+
+def summarize(samples, peaks, statuses):
+    """Summarize timing samples for the report"""
+    return {
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'mean_ms': round(statistics.mean(samples), 2),
+        'peak_memory_kb': round(max(peaks) / 1024, 1),
+        'status_codes': sorted(set(statuses))
+    }
+
+def drop_caches(finance_app):
+    """Forget every cached view model, template fragment and checkpoint schedule"""
+    finance_app.dashboard_cache['key'] = None
+    finance_app.fragment_cache['key'] = None
+    finance_app.format_date_string.cache_clear()
+    finance_app.checkpoint_schedule.cache_clear()
+
+def benchmark_scale(scale, iterations, cold):
+    """Generate a database at `scale` and time every route against it"""
+    with tempfile.TemporaryDirectory(prefix=f'finance_bench_{scale}_') as workdir:
+        try:
+            return run_benchmark(os.path.join(workdir, 'finance.db'), scale, iterations, cold)
+        finally:
+            database.release_connection()
+
+def run_benchmark(path, scale, iterations, cold):
+    import app as finance_app
+
+    print(f"Generating {scale} dataset...")
+    started = time.perf_counter()
+    generate_database(path, scale)
+    results = {'generate_seconds': round(time.perf_counter() - started, 2), 'routes': {}}
+
+    client = finance_app.app.test_client()
+    for url in ROUTES:
+        samples, peaks, statuses = [], [], []
+        for _ in range(iterations):
+            if cold:
+                drop_caches(finance_app)
+            elapsed, peak, status = time_request(client, 'get', url)
+            samples.append(elapsed)
+            peaks.append(peak)
+            statuses.append(status)
+        results['routes'][url] = summarize(samples, peaks, statuses)
+        print(f"  {url:<22} p50 {results['routes'][url]['p50_ms']:>9.2f} ms   "
+              f"p95 {results['routes'][url]['p95_ms']:>9.2f} ms")
+
+    # Import: re-upload the full export (mostly duplicates, exercises the whole pipeline)
+    from io import BytesIO
+    export = client.get('/api/export/full').get_data()
+    samples, peaks, statuses = [], [], []
+    for _ in range(max(1, iterations // 5)):
+        elapsed, peak, status = time_request(
+            client, 'post', '/api/import',
+            data={'file': (BytesIO(export), 'full_database_export.csv')},
+            content_type='multipart/form-data')
+        samples.append(elapsed)
+        peaks.append(peak)
+        statuses.append(status)
+    results['routes']['/api/import'] = summarize(samples, peaks, statuses)
+    print(f"  {'/api/import':<22} p50 {results['routes']['/api/import']['p50_ms']:>9.2f} ms")
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=list(SCALES))
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--cold', action='store_true', help='Drop the view caches before every request')
+    parser.add_argument('--output', default='benchmark_report.json')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    report = {
+        'date': date.today().isoformat(),
+        'iterations': args.iterations,
+        'cold': args.cold,
+        'scales': {}
+    }
+    for scale in args.scales:
+        report['scales'][scale] = benchmark_scale(scale, args.iterations, args.cold)
+    tracemalloc.stop()
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,251 @@
+import itertools
+import logging
 import sqlite3
+import threading
+from calendar import monthrange
+from contextlib import contextmanager
 from datetime import *
+from time import perf_counter
 from typing import List, Dict, Optional
 
 DATABASE_NAME = 'finance.db'
 
+# Connection tuning applied once per pooled connection
+CONNECTION_PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -8000',       # ~8 MB page cache
+    'PRAGMA mmap_size = 67108864',     # 64 MB memory-mapped I/O
+    'PRAGMA temp_store = MEMORY',
+]
+
+_local = threading.local()
+
+logger = logging.getLogger(__name__)
+
+# Notified after every commit that changed rows (wakes live event streams)
+change_condition = threading.Condition()
+
+# Commits that changed rows in this process. Bumped before any SQL in commit()
+# and added into get_data_version(), so caches see every local write even if
+# the data_generation row could not be updated.
+process_generation = 0
+
+# ==================== SQL PROFILING ====================
+
+def start_profile():
+    """Start recording SQL statements run on this thread"""
+    _local.profile = []
+
+def stop_profile():
+    """Stop recording and return the statements recorded since start_profile()"""
+    statements = getattr(_local, 'profile', None) or []
+    _local.profile = None
+    return statements
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor that records each statement's duration and row count"""
+    
+    entry = None
+    
+    def execute(self, sql, parameters=()):
+        started = perf_counter()
+        try:
+            return sqlite3.Cursor.execute(self, sql, parameters)
+        finally:
+            self._record(sql, started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = perf_counter()
+        try:
+            return sqlite3.Cursor.executemany(self, sql, seq_of_parameters)
+        finally:
+            self._record(sql, started)
+    
+    def fetchone(self):
+        started = perf_counter()
+        row = sqlite3.Cursor.fetchone(self)
+        self._add_rows(started, 1 if row is not None else 0)
+        return row
+    
+    def fetchmany(self, size=None):
+        started = perf_counter()
+        rows = sqlite3.Cursor.fetchmany(self, self.arraysize if size is None else size)
+        self._add_rows(started, len(rows))
+        return rows
+    
+    def fetchall(self):
+        started = perf_counter()
+        rows = sqlite3.Cursor.fetchall(self)
+        self._add_rows(started, len(rows))
+        return rows
+    
+    def _record(self, sql, started):
+        profile = getattr(_local, 'profile', None)
+        if profile is None:
+            self.entry = None
+            return
+        self.entry = {
+            'sql': ' '.join(sql.split()),
+            'ms': (perf_counter() - started) * 1000,
+            # rowcount covers writes; fetched rows are added for reads
+            'rows': max(self.rowcount, 0)
+        }
+        profile.append(self.entry)
+    
+    def _add_rows(self, started, count):
+        if self.entry is not None:
+            self.entry['ms'] += (perf_counter() - started) * 1000
+            self.entry['rows'] += count
+
+class PooledConnection(sqlite3.Connection):
+    """Shared connection whose close() keeps it open for the next caller"""
+    
+    committed_changes = 0
+    held_commits = 0
+    
+    def cursor(self, factory=None):
+        if factory is None:
+            profiling = getattr(_local, 'profile', None) is not None
+            factory = ProfilingCursor if profiling else sqlite3.Cursor
+        return sqlite3.Connection.cursor(self, factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def commit(self):
+        """Commit, bumping the data generation if anything was written"""
+        if self.held_commits:
+            return  # Inside transaction(): the outermost block commits
+        global process_generation
+        changed = self.total_changes != self.committed_changes
+        if changed:
+            with change_condition:
+                process_generation += 1
+            try:
+                self.execute('UPDATE data_generation SET generation = generation + 1 WHERE id = 1')
+                update_bill_occurrences(self.cursor())
+                self.execute('DELETE FROM change_log WHERE id <= (SELECT MAX(id) FROM change_log) - ?',
+                             (CHANGE_LOG_KEEP,))
+            except sqlite3.OperationalError as e:
+                # Tables not created yet (before init_database); the data is still committed
+                logger.warning('Skipped commit maintenance: %s', e)
+        sqlite3.Connection.commit(self)
+        self.committed_changes = self.total_changes
+        if changed:
+            with change_condition:
+                change_condition.notify_all()
+    
+    def close(self):
+        pass
+    
+    def release(self):
+        """Roll back anything left uncommitted and really close"""
+        if self.in_transaction:
+            self.rollback()
+        sqlite3.Connection.close(self)
+
 def get_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE_NAME)
+    """Get the shared database connection for the current thread/request"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.database_name == DATABASE_NAME:
+        return conn
+    if conn is not None:
+        conn.release()
+    
+    conn = sqlite3.connect(DATABASE_NAME, factory=PooledConnection)
     conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    conn.committed_changes = conn.total_changes
+    _local.conn = conn
+    _local.database_name = DATABASE_NAME
     return conn
 
+def release_connection(exception=None):
+    """Close the current thread's shared connection (called at request teardown)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        _local.conn = None
+        conn.release()
+
+@contextmanager
+def transaction():
+    """Run several database.py calls as one transaction with a single commit"""
+    conn = get_connection()
+    conn.held_commits += 1
+    try:
+        yield conn
+    except Exception:
+        conn.held_commits -= 1
+        if not conn.held_commits:
+            conn.rollback()
+        raise
+    conn.held_commits -= 1
+    conn.commit()
+
+# ==================== CHANGE FEED ====================
+
+def get_change_log_position():
+    """Id of the newest change_log entry (0 if empty)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT MAX(id) FROM change_log')
+    result = cursor.fetchone()[0]
+    conn.close()
+    return result or 0
+
+def get_changes_since(last_id, limit=200):
+    """Get (changes, new_last_id, resync) for change_log entries after `last_id`"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT MIN(id) FROM change_log')
+    oldest = cursor.fetchone()[0]
+    if oldest is not None and last_id < oldest - 1:
+        conn.close()
+        return [], get_change_log_position(), True
+    
+    cursor.execute('''
+        SELECT id, table_name, row_id, action FROM change_log
+        WHERE id > ? ORDER BY id LIMIT ?
+    ''', (last_id, limit))
+    entries = cursor.fetchall()
+    if not entries:
+        conn.close()
+        return [], last_id, False
+    
+    # Keep only the latest action per row
+    latest = {}
+    for entry in entries:
+        latest[(entry['table_name'], entry['row_id'])] = entry['action']
+    
+    rows = {}
+    for table in {table for table, _ in latest}:
+        ids = [row_id for t, row_id in latest if t == table]
+        placeholders = ','.join('?' for _ in ids)
+        cursor.execute(f'SELECT * FROM {table} WHERE id IN ({placeholders})', ids)
+        for row in cursor.fetchall():
+            rows[(table, row['id'])] = dict(row)
+    conn.close()
+    
+    changes = [{'table': table, 'id': row_id, 'action': action, 'row': rows.get((table, row_id))}
+               for (table, row_id), action in latest.items()]
+    return changes, entries[-1]['id'], False
+
+def wait_for_changes(timeout):
+    """Block until a commit in this process changes rows, or timeout passes"""
+    with change_condition:
+        return change_condition.wait(timeout)
+
+def get_data_version():
+    """Get the data generation, bumped by every commit that changed rows"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT generation FROM data_generation WHERE id = 1')
+    result = cursor.fetchone()
+    conn.close()
+    return (result['generation'] if result else 0) + process_generation
+
 def init_database():
     """Initialize database with all tables"""
     conn = get_connection()
@@ -226,6 +462,15 @@ def init_database():
         )
     ''')
     
+    # Data generation counter used to invalidate cached views
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 0)')
+    
     # V6.4: Add payable_by_cc column to bills if not exists
     try:
         cursor.execute('ALTER TABLE bills ADD COLUMN payable_by_cc INTEGER DEFAULT 0')
@@ -238,6 +483,9 @@ def init_database():
     except sqlite3.OperationalError:
         pass  # Column already exists
     
+    run_migrations(cursor)
+    update_bill_occurrences(cursor)
+    
     # Initialize default settings if not exists
     cursor.execute("SELECT COUNT(*) FROM user_settings")
     if cursor.fetchone()[0] == 0:
@@ -270,6 +518,226 @@ def init_database():
     conn.commit()
     conn.close()
 
+# ==================== SCHEMA MIGRATIONS ====================
+# Each entry upgrades the schema by one version; PRAGMA user_version records
+# how many have been applied. Append new migrations, never edit old ones.
+
+def summary_triggers(source, summary, keys, values, condition='1'):
+    """Triggers that keep `summary` in step with inserts, updates and deletes on `source`
+    
+    `keys` and `values` map summary columns to SQL over the source row,
+    written with ROW. (swapped for NEW. or OLD.); values are summed and
+    row_count tracks contributing rows. Only rows matching `condition` count.
+    """
+    def bind(sql, row):
+        return sql.replace('ROW.', f'{row}.')
+    
+    def add(row):
+        columns = [*keys, *values, 'row_count']
+        exprs = [bind(expr, row) for expr in [*keys.values(), *values.values()]] + ['1']
+        updates = ', '.join(f'{column} = {column} + excluded.{column}' for column in [*values, 'row_count'])
+        return (f"INSERT INTO {summary} ({', '.join(columns)}) SELECT {', '.join(exprs)} "
+                f"WHERE {bind(condition, row)} ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates};")
+    
+    def subtract(row):
+        updates = ', '.join(f'{column} = {column} - ({bind(expr, row)})' for column, expr in values.items())
+        match = ' AND '.join(f'{column} = {bind(expr, row)}' for column, expr in keys.items())
+        return (f"UPDATE {summary} SET {updates}, row_count = row_count - 1 "
+                f"WHERE {match} AND {bind(condition, row)}; "
+                f"DELETE FROM {summary} WHERE {match} AND row_count <= 0;")
+    
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {summary}_insert AFTER INSERT ON {source} BEGIN {add("NEW")} END',
+        f'CREATE TRIGGER IF NOT EXISTS {summary}_update AFTER UPDATE ON {source} '
+        f'BEGIN {subtract("OLD")} {add("NEW")} END',
+        f'CREATE TRIGGER IF NOT EXISTS {summary}_delete AFTER DELETE ON {source} BEGIN {subtract("OLD")} END',
+    ]
+
+# Tables whose row changes are recorded in change_log for the live event feed
+CHANGE_LOG_TABLES = ['account_balance', 'user_settings', 'bills', 'credit_accounts', 'income',
+                     'recurring_income', 'past_due_instances', 'credit_payment_overrides',
+                     'property_transactions', 'tax_obligations']
+
+# Number of change_log rows kept; clients further behind must resync
+CHANGE_LOG_KEEP = 5000
+
+MIGRATIONS = [
+    # 1: Indexes for the hot lookup paths (credit_payment_overrides lookups
+    #    already use its UNIQUE(credit_account_id, month, year) index)
+    [
+        'CREATE INDEX IF NOT EXISTS idx_bills_status_due_date ON bills (status, due_date)',
+        'CREATE INDEX IF NOT EXISTS idx_income_status_expected ON income (status, date_expected)',
+        'CREATE INDEX IF NOT EXISTS idx_income_status_received ON income (status, date_received)',
+        'CREATE INDEX IF NOT EXISTS idx_past_due_bill ON past_due_instances (bill_id)',
+        'CREATE INDEX IF NOT EXISTS idx_past_due_credit ON past_due_instances (credit_account_id)',
+        'CREATE INDEX IF NOT EXISTS idx_property_transactions_date ON property_transactions (date)',
+    ],
+    # 2: Row-level change log for the live event feed
+    [
+        '''CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            action TEXT NOT NULL
+        )''',
+    ] + [
+        f'''CREATE TRIGGER IF NOT EXISTS log_{table}_{action} AFTER {action.upper()} ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, action)
+                VALUES ('{table}', {'OLD' if action == 'delete' else 'NEW'}.id, '{action}');
+            END'''
+        for table in CHANGE_LOG_TABLES for action in ('insert', 'update', 'delete')
+    ],
+    # 3: Append-only payment ledger with monthly and category rollups kept
+    #    current by triggers on insert
+    [
+        'ALTER TABLE payment_history ADD COLUMN category TEXT',
+        '''UPDATE payment_history SET category = CASE
+               WHEN bill_id IS NOT NULL THEN (SELECT category FROM bills WHERE bills.id = payment_history.bill_id)
+               ELSE 'Debt' END''',
+        'CREATE INDEX IF NOT EXISTS idx_payment_history_date ON payment_history (payment_date)',
+        '''CREATE TABLE IF NOT EXISTS payment_monthly_totals (
+            month TEXT PRIMARY KEY,
+            total REAL NOT NULL DEFAULT 0,
+            payment_count INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS payment_category_totals (
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            payment_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, category)
+        )''',
+        '''INSERT INTO payment_monthly_totals (month, total, payment_count)
+           SELECT substr(payment_date, 1, 7), SUM(amount), COUNT(*) FROM payment_history GROUP BY 1''',
+        '''INSERT INTO payment_category_totals (month, category, total, payment_count)
+           SELECT substr(payment_date, 1, 7), COALESCE(category, 'Other'), SUM(amount), COUNT(*)
+           FROM payment_history GROUP BY 1, 2''',
+        '''CREATE TRIGGER IF NOT EXISTS payment_history_rollup AFTER INSERT ON payment_history
+            BEGIN
+                INSERT INTO payment_monthly_totals (month, total, payment_count)
+                VALUES (substr(NEW.payment_date, 1, 7), NEW.amount, 1)
+                ON CONFLICT (month) DO UPDATE SET
+                    total = total + excluded.total, payment_count = payment_count + 1;
+                INSERT INTO payment_category_totals (month, category, total, payment_count)
+                VALUES (substr(NEW.payment_date, 1, 7), COALESCE(NEW.category, 'Other'), NEW.amount, 1)
+                ON CONFLICT (month, category) DO UPDATE SET
+                    total = total + excluded.total, payment_count = payment_count + 1;
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS payment_history_no_update BEFORE UPDATE ON payment_history
+            BEGIN
+                SELECT RAISE(ABORT, 'payment_history is append-only; record a reversing payment instead');
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS payment_history_no_delete BEFORE DELETE ON payment_history
+            BEGIN
+                SELECT RAISE(ABORT, 'payment_history is append-only; record a reversing payment instead');
+            END''',
+    ],
+    # 4: Analytics summary tables, kept in step with their source tables by triggers
+    [
+        '''CREATE TABLE IF NOT EXISTS income_monthly_totals (
+            month TEXT PRIMARY KEY,
+            total REAL NOT NULL DEFAULT 0,
+            row_count INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS property_monthly_totals (
+            month TEXT PRIMARY KEY,
+            income REAL NOT NULL DEFAULT 0,
+            expense REAL NOT NULL DEFAULT 0,
+            row_count INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS bill_autopay_totals (
+            autopay INTEGER PRIMARY KEY,
+            total REAL NOT NULL DEFAULT 0,
+            row_count INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''INSERT INTO income_monthly_totals (month, total, row_count)
+           SELECT substr(date_received, 1, 7), SUM(amount), COUNT(*) FROM income
+           WHERE status = 'received' AND date_received IS NOT NULL GROUP BY 1''',
+        '''INSERT INTO property_monthly_totals (month, income, expense, row_count)
+           SELECT substr(date, 1, 7),
+                  SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END),
+                  SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END),
+                  COUNT(*)
+           FROM property_transactions GROUP BY 1''',
+        '''INSERT INTO bill_autopay_totals (autopay, total, row_count)
+           SELECT COALESCE(autopay, 0) != 0, SUM(amount), COUNT(*) FROM bills GROUP BY 1''',
+        *summary_triggers('income', 'income_monthly_totals',
+                          keys={'month': 'substr(ROW.date_received, 1, 7)'},
+                          values={'total': 'ROW.amount'},
+                          condition="ROW.status = 'received' AND ROW.date_received IS NOT NULL"),
+        *summary_triggers('property_transactions', 'property_monthly_totals',
+                          keys={'month': 'substr(ROW.date, 1, 7)'},
+                          values={'income': "CASE WHEN ROW.transaction_type = 'income' THEN ROW.amount ELSE 0 END",
+                                  'expense': "CASE WHEN ROW.transaction_type = 'expense' THEN ROW.amount ELSE 0 END"}),
+        *summary_triggers('bills', 'bill_autopay_totals',
+                          keys={'autopay': 'COALESCE(ROW.autopay, 0) != 0'},
+                          values={'total': 'ROW.amount'}),
+    ],
+    # 5: Bill occurrences materialized over a rolling horizon. Rows are generated
+    #    in Python (see update_bill_occurrences); triggers flag bills whose
+    #    schedule changed so they are regenerated before the next read.
+    [
+        '''CREATE TABLE IF NOT EXISTS bill_occurrences (
+            bill_id INTEGER NOT NULL,
+            due_date DATE NOT NULL,
+            recurring INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (bill_id, due_date)
+        ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_bill_occurrences_date ON bill_occurrences (due_date, bill_id)',
+        '''CREATE TABLE IF NOT EXISTS bill_occurrence_horizon (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL
+        )''',
+        'CREATE TABLE IF NOT EXISTS bill_occurrences_stale (bill_id INTEGER PRIMARY KEY)',
+        '''CREATE TRIGGER IF NOT EXISTS bill_occurrences_stale_insert AFTER INSERT ON bills
+            BEGIN
+                INSERT OR IGNORE INTO bill_occurrences_stale (bill_id) VALUES (NEW.id);
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS bill_occurrences_stale_update
+            AFTER UPDATE OF due_day, due_date, frequency ON bills
+            BEGIN
+                INSERT OR IGNORE INTO bill_occurrences_stale (bill_id) VALUES (NEW.id);
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS bill_occurrences_delete AFTER DELETE ON bills
+            BEGIN
+                DELETE FROM bill_occurrences WHERE bill_id = OLD.id;
+                DELETE FROM bill_occurrences_stale WHERE bill_id = OLD.id;
+            END''',
+    ],
+    # 6: Upcoming tax obligations by due date
+    [
+        'CREATE INDEX IF NOT EXISTS idx_tax_obligations_due_date ON tax_obligations (due_date)',
+    ],
+    # 7: Transactions imported from bank and card statements; content_hash
+    #    makes re-importing an overlapping statement a no-op
+    [
+        '''CREATE TABLE IF NOT EXISTS bank_transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL DEFAULT '',
+            posted_date DATE NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            memo TEXT,
+            fit_id TEXT,
+            content_hash TEXT NOT NULL,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_bank_transactions_hash ON bank_transactions (content_hash)',
+        'CREATE INDEX IF NOT EXISTS idx_bank_transactions_date ON bank_transactions (posted_date)',
+    ],
+]
+
+def run_migrations(cursor):
+    """Apply any migrations newer than the database's user_version"""
+    cursor.execute('PRAGMA user_version')
+    version = cursor.fetchone()[0]
+    for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(f'PRAGMA user_version = {number}')
+
 def get_account_balance():
     """Get current Wells Fargo account balance"""
     conn = get_connection()
@@ -323,19 +791,9 @@ def get_overdue_bills():
     return [dict(row) for row in results]
 
 def get_upcoming_bills(days: int = 30):
-    """Get bills due in next X days"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    """Get bills due in next X days (one entry per occurrence)"""
     today = date.today()
-    cursor.execute('''
-        SELECT * FROM bills 
-        WHERE (due_date IS NOT NULL AND due_date >= ? AND status = 'pending')
-        OR (due_day IS NOT NULL AND status = 'pending')
-        ORDER BY due_date, due_day
-    ''', (today,))
-    results = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in results]
+    return get_bills_for_period(today, today + timedelta(days=days))
 
 def add_bill(name: str, category: str, amount: float, due_day: int = None, 
              frequency: str = 'monthly', autopay: bool = False, due_date: date = None):
@@ -346,13 +804,24 @@ def add_bill(name: str, category: str, amount: float, due_day: int = None,
         INSERT INTO bills (name, category, amount, due_day, frequency, autopay, due_date)
         VALUES (?, ?, ?, ?, ?, ?, ?)
     ''', (name, category, amount, due_day, frequency, 1 if autopay else 0, due_date))
+    bill_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    return bill_id
+
+def record_bill_paid(cursor, bill_id: int, payment_date: date, amount: float = None):
+    """Ledger entry for a bill about to be marked paid (none if it already is)"""
+    cursor.execute('''
+        INSERT INTO payment_history (bill_id, amount, payment_date, category)
+        SELECT id, COALESCE(?, amount), ?, category FROM bills
+        WHERE id = ? AND status != 'paid'
+    ''', (amount, payment_date, bill_id))
 
 def mark_bill_paid(bill_id: int, payment_date: date):
-    """Mark a bill as paid"""
+    """Mark a bill as paid and record the payment in the ledger"""
     conn = get_connection()
     cursor = conn.cursor()
+    record_bill_paid(cursor, bill_id, payment_date)
     cursor.execute('''
         UPDATE bills 
         SET status = 'paid', last_paid_date = ?
@@ -376,7 +845,7 @@ def mark_bill_overdue(bill_id: int):
 def update_bill(bill_id: int, name: str = None, emoji: str = None, amount: float = None, 
                due_day: int = None, frequency: str = None, 
                autopay: bool = None, status: str = None):
-    """Update bill with multiple fields"""
+    """Update bill with multiple fields (status 'paid' is recorded in the ledger)"""
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -405,6 +874,10 @@ def update_bill(bill_id: int, name: str = None, emoji: str = None, amount: float
     if status is not None:
         updates.append('status = ?')
         values.append(status)
+    if status == 'paid':
+        updates.append('last_paid_date = ?')
+        values.append(date.today())
+        record_bill_paid(cursor, bill_id, date.today(), amount)
     
     if updates:
         values.append(bill_id)
@@ -458,8 +931,10 @@ def add_credit_account(name: str, account_type: str, balance: float,
          apr, cycle_close_day, payment_due_day)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     ''', (name, account_type, balance, limit, min_payment, apr, cycle_close_day, payment_due_day))
+    account_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    return account_id
 
 def update_credit_balance(account_id: int, new_balance: float):
     """Update credit account balance"""
@@ -557,8 +1032,44 @@ def add_income(source: str, amount: float, date_expected: date, status: str = 'e
         INSERT INTO income (source, amount, date_expected, status)
         VALUES (?, ?, ?, ?)
     ''', (source, amount, date_expected, status))
+    income_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return income_id
+
+def add_received_income(source: str, amount: float, date_received: date):
+    """Record income that has already been received"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO income (source, amount, date_received, status)
+        VALUES (?, ?, ?, 'received')
+    ''', (source, amount, date_received))
+    income_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    return income_id
+
+def update_income(income_id, **kwargs):
+    """Update an income record"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    fields = []
+    values = []
+    for key, value in kwargs.items():
+        if key in ['source', 'amount', 'date_received', 'date_expected', 'status', 'notes']:
+            fields.append(f"{key} = ?")
+            values.append(value)
+    
+    if fields:
+        values.append(income_id)
+        query = f"UPDATE income SET {', '.join(fields)} WHERE id = ?"
+        cursor.execute(query, values)
+        conn.commit()
+    
+    conn.close()
+    return True
 
 def mark_income_received(income_id: int, date_received: date):
     """Mark income as received"""
@@ -576,10 +1087,13 @@ def get_property_transactions(months: int = 3):
     """Get property transactions for last X months"""
     conn = get_connection()
     cursor = conn.cursor()
+    today = date.today()
+    cutoff_date = add_months(today.year, today.month, -months, today.day)
     cursor.execute('''
         SELECT * FROM property_transactions
+        WHERE date >= ?
         ORDER BY date DESC
-    ''')
+    ''', (cutoff_date,))
     results = cursor.fetchall()
     conn.close()
     return [dict(row) for row in results]
@@ -676,8 +1190,10 @@ def add_past_due_instance(bill_id: int = None, credit_account_id: int = None, pe
         INSERT INTO past_due_instances (bill_id, credit_account_id, period, amount)
         VALUES (?, ?, ?, ?)
     ''', (bill_id, credit_account_id, period, amount))
+    instance_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    return instance_id
 
 def delete_past_due_instance(instance_id: int):
     """Delete a past due instance"""
@@ -775,53 +1291,57 @@ def delete_recurring_income(income_id):
     conn.close()
     return True
 
-def generate_income_for_period(start_date, end_date):
-    """Generate expected income entries for a date range from recurring income"""
-    from datetime import timedelta
+def iter_recurrence_dates(frequency, source_start, source_end, day_of_month, start_date, end_date):
+    """Yield occurrence dates of a recurrence rule inside [start_date, end_date]
+
+    Jumps straight from one occurrence to the next instead of testing every
+    day, so the cost depends on the number of paychecks, not the window size.
+    """
     import calendar
     
+    lo = max(start_date, source_start)
+    hi = min(end_date, source_end) if source_end else end_date
+    if lo > hi:
+        return
+    
+    if frequency in ('weekly', 'bi-weekly'):
+        step = 7 if frequency == 'weekly' else 14
+        # First multiple of step days from source_start on or after lo
+        offset = (lo - source_start).days
+        current = source_start + timedelta(days=-(-offset // step) * step)
+        while current <= hi:
+            yield current
+            current = current + timedelta(days=step)
+    
+    elif frequency == 'monthly' and day_of_month:
+        year, month = lo.year, lo.month
+        while (year, month) <= (hi.year, hi.month):
+            # Clamp to the last day of short months (e.g. 31 -> Feb 28)
+            day = min(int(day_of_month), calendar.monthrange(year, month)[1])
+            current = date(year, month, day)
+            if lo <= current <= hi:
+                yield current
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
+
+def generate_income_for_period(start_date, end_date):
+    """Generate expected income entries for a date range from recurring income"""
     recurring = get_recurring_income()
     generated = []
     
     for income in recurring:
-        freq = income['frequency']
         source_start = datetime.strptime(income['start_date'], '%Y-%m-%d').date() if isinstance(income['start_date'], str) else income['start_date']
         source_end = datetime.strptime(income['end_date'], '%Y-%m-%d').date() if income['end_date'] and isinstance(income['end_date'], str) else None
         
-        current = start_date
-        while current <= end_date:
-            # Skip if before start or after end
-            if current < source_start:
-                current = current + timedelta(days=1)
-                continue
-            if source_end and current > source_end:
-                break
-                
-            should_generate = False
-            
-            if freq == 'bi-weekly':
-                # Calculate weeks since start
-                days_diff = (current - source_start).days
-                if days_diff % 14 == 0:
-                    should_generate = True
-            elif freq == 'monthly' and income['day_of_month']:
-                # Monthly on specific day
-                if current.day == income['day_of_month']:
-                    should_generate = True
-            elif freq == 'weekly':
-                # Weekly on same weekday
-                if current.weekday() == source_start.weekday():
-                    should_generate = True
-                    
-            if should_generate:
-                generated.append({
-                    'source': income['source'],
-                    'amount': income['amount'],
-                    'date_expected': current,
-                    'recurring_id': income['id']
-                })
-            
-            current = current + timedelta(days=1)
+        for occurrence in iter_recurrence_dates(income['frequency'], source_start, source_end,
+                                                income['day_of_month'], start_date, end_date):
+            generated.append({
+                'source': income['source'],
+                'amount': income['amount'],
+                'date_expected': occurrence,
+                'recurring_id': income['id']
+            })
     
     return generated
 
@@ -890,17 +1410,35 @@ def delete_category(cat_id):
     return True
 
 # Batch Operations
+def row_exists(table: str, row_id: int):
+    """Whether `table` has a row with this id (table names come from code, never input)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT 1 FROM {table} WHERE id = ?', (row_id,))
+    result = cursor.fetchone()
+    conn.close()
+    return result is not None
+
 def mark_bills_paid_for_period(start_date, end_date):
     """Mark all bills in a period as paid"""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE bills 
-        SET status = 'paid', last_paid_date = CURRENT_DATE
+    condition = '''
         WHERE status IN ('pending', 'overdue')
         AND ((due_date BETWEEN ? AND ?) OR 
              (due_day IS NOT NULL AND frequency = 'monthly'))
-    ''', (start_date, end_date))
+    '''
+    # Local date, as mark_bill_paid uses (SQL CURRENT_DATE is UTC)
+    today = date.today().isoformat()
+    cursor.execute(f'''
+        INSERT INTO payment_history (bill_id, amount, payment_date, category)
+        SELECT id, amount, ?, category FROM bills {condition}
+    ''', (today, start_date, end_date))
+    cursor.execute(f'''
+        UPDATE bills 
+        SET status = 'paid', last_paid_date = ?
+        {condition}
+    ''', (today, start_date, end_date))
     count = cursor.rowcount
     conn.commit()
     conn.close()
@@ -928,6 +1466,370 @@ def clear_paid_bills(before_date=None):
     conn.close()
     return count
 
+# ==================== BILL OCCURRENCES ====================
+
+# Months between occurrences for bills scheduled from a due_date
+BILL_FREQUENCY_MONTHS = {
+    'monthly': 1,
+    'bi-monthly': 2,
+    'quarterly': 3,
+    'semi-annual': 6,
+    'annual': 12,
+    'triennial': 36,
+}
+
+def parse_date(value):
+    """Parse a stored YYYY-MM-DD value, passing dates through unchanged"""
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+def add_months(year, month, months, day):
+    """Date `months` after (year, month) on `day`, clamped to the month length"""
+    index = year * 12 + (month - 1) + months
+    year, month = divmod(index, 12)
+    month += 1
+    return date(year, month, min(day, monthrange(year, month)[1]))
+
+def bill_recurs(bill):
+    """Whether a bill's schedule repeats (otherwise it is due once, on due_date)"""
+    if bill['frequency'] == 'monthly' and bill['due_day']:
+        return True
+    return bool(bill['due_date']) and bill['frequency'] in BILL_FREQUENCY_MONTHS
+
+def iter_bill_schedule(bill, start, end):
+    """Yield every date in [start, end] the bill's schedule makes it due, ignoring status"""
+    frequency = bill['frequency']
+    due_date = parse_date(bill['due_date'])
+    
+    if frequency == 'monthly' and bill['due_day']:
+        occurrences = (add_months(start.year, start.month, n, bill['due_day']) for n in itertools.count())
+    elif due_date and frequency in BILL_FREQUENCY_MONTHS:
+        step = BILL_FREQUENCY_MONTHS[frequency]
+        # Jump straight to the first occurrence in or after start's month
+        months_behind = (start.year - due_date.year) * 12 + start.month - due_date.month
+        first = max(0, -(-months_behind // step)) * step
+        occurrences = (add_months(due_date.year, due_date.month, n, due_date.day)
+                       for n in itertools.count(first, step))
+    elif due_date:
+        occurrences = iter([due_date])
+    else:
+        return
+    
+    for occurrence in occurrences:
+        if occurrence > end:
+            break
+        if occurrence >= start:
+            yield occurrence
+
+def iter_bill_dates(bill, start, end):
+    """Yield the due dates of a bill inside [start, end]"""
+    if bill['status'] == 'paid' and not bill_recurs(bill):
+        return
+    today = date.today()
+    for occurrence in iter_bill_schedule(bill, start, end):
+        # A bill marked paid is settled for the current month only
+        if bill['status'] == 'paid' and (occurrence.year, occurrence.month) == (today.year, today.month):
+            continue
+        yield occurrence
+
+# Months of occurrences kept materialized before and after the current month
+OCCURRENCE_HISTORY_MONTHS = 12
+OCCURRENCE_HORIZON_MONTHS = 24
+
+def _insert_bill_occurrences(cursor, bills, start, end):
+    cursor.executemany(
+        'INSERT OR IGNORE INTO bill_occurrences (bill_id, due_date, recurring) VALUES (?, ?, ?)',
+        ((bill['id'], due, 1 if bill_recurs(bill) else 0)
+         for bill in bills for due in iter_bill_schedule(bill, start, end)))
+
+def refresh_bill_occurrences(cursor, bill_ids):
+    """Regenerate the occurrences of the given bills over the stored horizon"""
+    cursor.execute('SELECT start_date, end_date FROM bill_occurrence_horizon WHERE id = 1')
+    horizon = cursor.fetchone()
+    placeholders = ', '.join('?' * len(bill_ids))
+    cursor.execute(f'DELETE FROM bill_occurrences WHERE bill_id IN ({placeholders})', bill_ids)
+    cursor.execute(f'DELETE FROM bill_occurrences_stale WHERE bill_id IN ({placeholders})', bill_ids)
+    if horizon:
+        cursor.execute(f'SELECT id, frequency, due_day, due_date FROM bills WHERE id IN ({placeholders})',
+                       bill_ids)
+        _insert_bill_occurrences(cursor, cursor.fetchall(),
+                                 parse_date(horizon['start_date']), parse_date(horizon['end_date']))
+
+def update_bill_occurrences(cursor):
+    """Regenerate stale bills' occurrences and widen the horizon (run by every write and at startup)"""
+    cursor.execute('SELECT bill_id FROM bill_occurrences_stale')
+    stale = [row[0] for row in cursor.fetchall()]
+    if stale:
+        refresh_bill_occurrences(cursor, stale)
+    
+    today = date.today()
+    new_start = add_months(today.year, today.month, -OCCURRENCE_HISTORY_MONTHS, 1)
+    new_end = add_months(today.year, today.month, OCCURRENCE_HORIZON_MONTHS + 1, 1) - timedelta(days=1)
+    cursor.execute('SELECT start_date, end_date FROM bill_occurrence_horizon WHERE id = 1')
+    horizon = cursor.fetchone()
+    if horizon:
+        covered = (parse_date(horizon[0]), parse_date(horizon[1]))
+        if covered[0] <= new_start and new_end <= covered[1]:
+            return
+    
+    cursor.execute('SELECT id, frequency, due_day, due_date FROM bills')
+    bills = cursor.fetchall()
+    if horizon:
+        new_start, new_end = min(new_start, covered[0]), max(new_end, covered[1])
+        if new_start < covered[0]:
+            _insert_bill_occurrences(cursor, bills, new_start, covered[0] - timedelta(days=1))
+        if new_end > covered[1]:
+            _insert_bill_occurrences(cursor, bills, covered[1] + timedelta(days=1), new_end)
+    else:
+        _insert_bill_occurrences(cursor, bills, new_start, new_end)
+    cursor.execute('INSERT OR REPLACE INTO bill_occurrence_horizon (id, start_date, end_date) VALUES (1, ?, ?)',
+                   (new_start, new_end))
+
+def get_bill_occurrence_horizon():
+    """(start_date, end_date) covered by bill_occurrences, or None before the first write"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT start_date, end_date FROM bill_occurrence_horizon WHERE id = 1')
+    result = cursor.fetchone()
+    conn.close()
+    return (parse_date(result['start_date']), parse_date(result['end_date'])) if result else None
+
+# Excludes occurrences settled by a bill being marked paid (see iter_bill_dates)
+UNSETTLED_OCCURRENCE = "NOT (b.status = 'paid' AND (o.recurring = 0 OR o.due_date BETWEEN :month_start AND :month_end))"
+
+def occurrence_params(start_date, end_date, **extra):
+    """Named parameters for occurrence queries over [start_date, end_date] (paid = settled this month)"""
+    today = date.today()
+    return dict(extra, start=start_date, end=end_date,
+                month_start=date(today.year, today.month, 1),
+                month_end=add_months(today.year, today.month, 1, 1) - timedelta(days=1))
+
+def get_bills_for_period(start_date: date, end_date: date):
+    """Bill occurrences due in [start_date, end_date], one row per occurrence
+    
+    Each row is the bill plus `calculated_due_date`. A bill marked paid is
+    settled for the current month (one-time bills entirely), matching the
+    planner. Only dates inside get_bill_occurrence_horizon() are covered.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT b.*, o.due_date as calculated_due_date
+        FROM bill_occurrences o
+        JOIN bills b ON b.id = o.bill_id
+        WHERE o.due_date BETWEEN :start AND :end
+        AND {UNSETTLED_OCCURRENCE}
+        ORDER BY o.due_date, b.id
+    ''', occurrence_params(start_date, end_date))
+    results = cursor.fetchall()
+    conn.close()
+    return [dict(row, calculated_due_date=parse_date(row['calculated_due_date'])) for row in results]
+
+def get_upcoming_obligations(start_date: date, end_date: date, threshold: float = 0):
+    """Bills, credit minimums and unpaid taxes over `threshold` due in [start_date, end_date]"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        WITH RECURSIVE months(month_start) AS (
+            SELECT date(:start, 'start of month')
+            UNION ALL
+            SELECT date(month_start, '+1 month') FROM months
+            WHERE month_start < date(:end, 'start of month')
+        ),
+        credit_due AS (
+            SELECT ca.id, ca.name, ca.emoji,
+                   COALESCE(po.override_amount, ca.minimum_payment) as amount,
+                   date(m.month_start, '+' || (MIN(ca.payment_due_day,
+                        CAST(strftime('%d', m.month_start, '+1 month', '-1 day') AS INTEGER)) - 1) || ' days') as due_date
+            FROM credit_accounts ca
+            CROSS JOIN months m
+            LEFT JOIN credit_payment_overrides po
+                ON po.credit_account_id = ca.id
+                AND po.month = CAST(strftime('%m', m.month_start) AS INTEGER)
+                AND po.year = CAST(strftime('%Y', m.month_start) AS INTEGER)
+            WHERE ca.payment_due_day IS NOT NULL
+        )
+        SELECT 'bill' as type, b.id, COALESCE(b.emoji, '📄') || ' ' || b.name as name,
+               b.amount, o.due_date
+        FROM bill_occurrences o
+        JOIN bills b ON b.id = o.bill_id
+        WHERE o.due_date BETWEEN :start AND :end
+        AND b.amount > :threshold
+        AND {UNSETTLED_OCCURRENCE}
+        UNION ALL
+        SELECT 'credit', id, COALESCE(emoji, '💳') || ' ' || name || ' - Min Payment', amount, due_date
+        FROM credit_due
+        WHERE due_date BETWEEN :start AND :end AND amount > :threshold
+        UNION ALL
+        SELECT 'tax', id, '💰 ' || tax_type, amount_due, due_date
+        FROM tax_obligations
+        WHERE due_date BETWEEN :start AND :end AND status != 'paid' AND amount_due > :threshold
+        ORDER BY due_date, type, name
+    ''', occurrence_params(start_date, end_date, threshold=threshold))
+    results = cursor.fetchall()
+    conn.close()
+    return [dict(row, due_date=parse_date(row['due_date'])) for row in results]
+
+# ==================== BANK TRANSACTIONS ====================
+
+def import_bank_transactions(transactions, batch_size: int = 1000):
+    """Insert statement transactions, skipping ones already imported
+    
+    Consumes the iterator `batch_size` rows at a time: each batch is one
+    executemany and one commit, so memory stays flat and a failure keeps
+    the batches already written. Returns (imported, skipped).
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    imported = skipped = 0
+    batch = []
+    
+    def flush():
+        nonlocal imported, skipped
+        cursor.executemany('''
+            INSERT OR IGNORE INTO bank_transactions
+            (account, posted_date, amount, description, memo, fit_id, content_hash)
+            VALUES (:account, :posted_date, :amount, :description, :memo, :fit_id, :content_hash)
+        ''', batch)
+        imported += cursor.rowcount
+        skipped += len(batch) - cursor.rowcount
+        conn.commit()
+        batch.clear()
+    
+    for txn in transactions:
+        batch.append(txn)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    conn.close()
+    return imported, skipped
+
+def get_bank_transactions(start_date: date = None, end_date: date = None, limit: int = 500):
+    """Imported transactions in a date range, newest first"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT * FROM bank_transactions
+        WHERE posted_date BETWEEN ? AND ?
+        ORDER BY posted_date DESC, id DESC
+        LIMIT ?
+    ''', (start_date or date.min, end_date or date.max, limit))
+    results = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in results]
+
+# ==================== PAYMENT LEDGER ====================
+
+def record_payment(amount: float, payment_date: date, bill_id: int = None,
+                   credit_account_id: int = None, category: str = None, notes: str = None):
+    """Append a payment to the ledger (rollups update automatically)
+    
+    The ledger is append-only: correct a mistake with a negative amount.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    if category is None:
+        if bill_id:
+            cursor.execute('SELECT category FROM bills WHERE id = ?', (bill_id,))
+            result = cursor.fetchone()
+            category = result['category'] if result else 'Other'
+        else:
+            category = 'Debt'
+    cursor.execute('''
+        INSERT INTO payment_history (bill_id, credit_account_id, amount, payment_date, category, notes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (bill_id, credit_account_id, amount, payment_date, category, notes))
+    payment_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return payment_id
+
+def get_payment_history(limit: int = 100, before_id: int = None):
+    """Get ledger entries, newest first (page with before_id)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT ph.*, COALESCE(b.name, ca.name) as item_name
+        FROM payment_history ph
+        LEFT JOIN bills b ON ph.bill_id = b.id
+        LEFT JOIN credit_accounts ca ON ph.credit_account_id = ca.id
+        WHERE ph.id < ?
+        ORDER BY ph.id DESC
+        LIMIT ?
+    ''', (before_id if before_id else 2 ** 63 - 1, limit))
+    results = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in results]
+
+def get_spending_by_category(start_month: str = None, end_month: str = None):
+    """Payment totals per category from the rollup table"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT category, SUM(total) as total, SUM(payment_count) as payment_count
+        FROM payment_category_totals
+        WHERE month BETWEEN ? AND ?
+        GROUP BY category
+        ORDER BY total DESC
+    ''', (start_month or '0000-00', end_month or '9999-99'))
+    results = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in results]
+
+# ==================== ANALYTICS ====================
+# Reads come from summary tables kept current by triggers (see MIGRATIONS),
+# so cost depends on the number of months asked for, not on history length.
+
+def get_outflow_by_category(start_month: str, end_month: str):
+    """Payments per month and category ('YYYY-MM' bounds, inclusive)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT month, category, total, payment_count FROM payment_category_totals
+        WHERE month BETWEEN ? AND ?
+        ORDER BY month, total DESC
+    ''', (start_month, end_month))
+    results = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in results]
+
+def get_income_vs_bills(start_month: str, end_month: str):
+    """Received income and bill payments per month, as two dicts keyed by 'YYYY-MM'"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT month, total FROM income_monthly_totals WHERE month BETWEEN ? AND ?',
+                   (start_month, end_month))
+    income = {row['month']: row['total'] for row in cursor.fetchall()}
+    cursor.execute('SELECT month, total FROM payment_monthly_totals WHERE month BETWEEN ? AND ?',
+                   (start_month, end_month))
+    payments = {row['month']: row['total'] for row in cursor.fetchall()}
+    conn.close()
+    return income, payments
+
+def get_autopay_share():
+    """Bill count and amount for autopay and manual bills"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT autopay, total, row_count FROM bill_autopay_totals')
+    results = cursor.fetchall()
+    conn.close()
+    return {bool(row['autopay']): dict(row) for row in results}
+
+def get_property_net_by_month(start_month: str, end_month: str):
+    """Property income, expenses and net per month"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT month, income, expense, income - expense as net FROM property_monthly_totals
+        WHERE month BETWEEN ? AND ?
+        ORDER BY month
+    ''', (start_month, end_month))
+    results = cursor.fetchall()
+    conn.close()
+    return [dict(row) for row in results]
+
 # ==================== V6.4: CREDIT PAYMENT OVERRIDES ====================
 
 def get_payment_override(credit_account_id, month, year):
@@ -1132,6 +2034,63 @@ def reset_monthly_bills():
     conn.close()
     return count
 
+# ==================== QUERY PLANS ====================
+
+# Hot read paths, the arguments to call them with, and tables they may scan
+# in full (checked by check_query_plans())
+HOT_QUERIES = {
+    'overdue_bills': (get_overdue_bills, (), ()),
+    'upcoming_bills': (get_upcoming_bills, (), ()),
+    'upcoming_income': (get_upcoming_income, (), ()),
+    'recent_income': (get_recent_income, (), ()),
+    'past_due_by_bill': (get_past_due_instances, (1,), ()),
+    'past_due_by_credit': (get_past_due_instances, (None, 1), ()),
+    'property_transactions': (get_property_transactions, (), ()),
+    'payment_override': (get_payment_override, (1, 1, 2025), ()),
+    # One row per card joined to each month of the generated `months` CTE
+    'upcoming_obligations': (get_upcoming_obligations, (date.today(), date.today() + timedelta(days=90)),
+                             ('ca', 'm', 'months')),
+    'bank_transactions': (get_bank_transactions, (date.today() - timedelta(days=30), date.today()), ()),
+}
+
+def table_scans(details):
+    """Tables an EXPLAIN QUERY PLAN reads in full, without an index"""
+    return [detail.split()[1] for detail in details
+            if detail.startswith('SCAN ') and 'INDEX' not in detail and 'CONSTANT ROW' not in detail]
+
+def check_query_plans():
+    """Call each hot read path and EXPLAIN QUERY PLAN every statement it runs
+    
+    Statements are captured (with their bound values) through the
+    connection's trace callback, so the plans are for the SQL the app
+    really executes.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    report = {}
+    for name, (function, args, expected_scans) in HOT_QUERIES.items():
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            function(*args)
+        finally:
+            conn.set_trace_callback(None)
+        details = []
+        for statement in statements:
+            if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                cursor.execute(f'EXPLAIN QUERY PLAN {statement}')
+                details.extend(row['detail'] for row in cursor.fetchall())
+        report[name] = {
+            'plan': details,
+            'uses_index': bool(details) and set(table_scans(details)) <= set(expected_scans)
+        }
+    conn.close()
+    return report
+
 if __name__ == '__main__':
+    import sys
     init_database()
     print("Database initialized successfully!")
+    if '--check-indexes' in sys.argv:
+        for name, result in check_query_plans().items():
+            print(f"{'OK ' if result['uses_index'] else 'SCAN'} {name}: {'; '.join(result['plan'])}")
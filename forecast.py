@@ -0,0 +1,253 @@
+"""Cash-flow forecasting over arbitrary horizons
+
+Bills, credit minimums, recurring income and past due amounts are expanded
+once into a daily timeline held in flat arrays. Running balances come from
+cumulative sums, so "lowest balance" and "first shortfall" questions over
+years of data are answered without re-walking bills or income.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import accumulate
+import json
+
+from database import (add_months, get_account_balance, get_all_bills, get_all_credit_accounts,
+                      get_past_due_instances, get_recurring_income, get_settings,
+                      get_upcoming_income, iter_bill_dates, iter_recurrence_dates, parse_date)
+
+# ==================== CHECKPOINT SCHEDULE ====================
+
+# Last confirmed PEF Admin paycheck (a Wednesday); NYS payroll is bi-weekly from here
+NYS_PAYROLL_ANCHOR = date(2025, 11, 5)
+
+@lru_cache(maxsize=256)
+def checkpoint_schedule(mode, count, start, days=(), anchor=None):
+    """The first `count` checkpoint dates on or after `start`, computed directly
+
+    mode '1-10-20' and 'custom' use fixed days of each month (`days`; days a
+    month doesn't have are skipped), 'nys-payroll' steps 14 days from
+    `anchor`. Returns a tuple; results are cached per argument set.
+    """
+    if count <= 0:
+        return ()
+
+    if mode == 'nys-payroll':
+        anchor = anchor or NYS_PAYROLL_ANCHOR
+        # Whole pay periods from the anchor to the first payday on or after start
+        first = anchor + timedelta(days=-(-(start - anchor).days // 14) * 14)
+        return tuple(first + timedelta(days=14 * n) for n in range(count))
+
+    if mode == '1-10-20':
+        days = (1, 10, 20)
+    days = sorted({int(day) for day in days if 1 <= int(day) <= 31})
+    if not days:
+        return ()
+
+    checkpoints = []
+    year, month = start.year, start.month
+    while len(checkpoints) < count:
+        month_length = monthrange(year, month)[1]
+        for day in days:
+            if day <= month_length and date(year, month, day) >= start:
+                checkpoints.append(date(year, month, day))
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return tuple(checkpoints[:count])
+
+def checkpoint_schedule_for_settings(settings, count=None, mode=None, custom_days=None, start_date=None):
+    """Checkpoint dates for the user's settings, with optional overrides"""
+    settings = settings or {}
+    count = count or settings.get('checkpoint_count') or 3
+    mode = mode or settings.get('checkpoint_mode') or '1-10-20'
+    start_date = start_date or date.today()
+
+    days = ()
+    if mode == 'custom':
+        custom_days = custom_days or settings.get('custom_checkpoint_days')
+        if custom_days:
+            days = tuple(json.loads(custom_days) if isinstance(custom_days, str) else custom_days)
+    anchor = parse_date(settings.get('nys_payroll_start_date')) if mode == 'nys-payroll' else None
+
+    return list(checkpoint_schedule(mode, int(count), start_date, days, anchor))
+
+def load_checkpoint_snapshot():
+    """Load everything the planner needs in one pass
+
+    Bills, credit accounts, past due instances and income rules are read
+    once so every checkpoint window and forecast is computed from memory.
+    """
+    account = get_account_balance()
+    settings = get_settings()
+    return {
+        'account': account,
+        'settings': settings,
+        'cushion': settings['cushion_amount'] if settings else 0,
+        'bills': get_all_bills(),
+        'credit_accounts': get_all_credit_accounts(),
+        'past_due_instances': get_past_due_instances(),
+        'recurring_income': get_recurring_income(),
+        'expected_income': get_upcoming_income()
+    }
+
+class CashFlowTimeline:
+    """Dated inflows and outflows over a fixed horizon, stored column-wise
+
+    Events are sorted by day; `day`, `amount` and `direction` are parallel
+    arrays and `items` holds the display rows. Per-day totals and their
+    cumulative sums are built once, so any window total is two lookups.
+    """
+
+    def __init__(self, start, days, opening_balance=0.0):
+        self.start = start
+        self.days = days
+        self.opening_balance = opening_balance
+        self.day = array('l')
+        self.amount = array('d')
+        self.direction = array('b')   # +1 inflow, -1 outflow
+        self.items = []
+        self._pending = []
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=self.days - 1)
+
+    def add(self, when, amount, direction, item):
+        """Queue an event; call finalize() once everything is added"""
+        offset = (when - self.start).days
+        if 0 <= offset < self.days and amount:
+            self._pending.append((offset, direction, amount, item))
+
+    def finalize(self):
+        """Sort events into the column arrays and build running totals"""
+        self._pending.sort(key=lambda event: (event[0], event[1]))
+        inflow = array('d', [0.0]) * self.days
+        outflow = array('d', [0.0]) * self.days
+        for offset, direction, amount, item in self._pending:
+            self.day.append(offset)
+            self.amount.append(amount)
+            self.direction.append(direction)
+            self.items.append(item)
+            if direction > 0:
+                inflow[offset] += amount
+            else:
+                outflow[offset] += amount
+        self._pending = []
+
+        # Prefix sums with a leading zero: total over [a, b] = cum[b + 1] - cum[a]
+        self.cum_inflow = array('d', accumulate(inflow, initial=0.0))
+        self.cum_outflow = array('d', accumulate(outflow, initial=0.0))
+        self.balances = array('d', (self.opening_balance + i - o
+                                    for i, o in zip(self.cum_inflow[1:], self.cum_outflow[1:])))
+        return self
+
+    def _clip(self, start, end):
+        lo = max(0, (start - self.start).days)
+        hi = min(self.days - 1, (end - self.start).days)
+        return lo, hi
+
+    def totals_between(self, start, end):
+        """(inflow, outflow) for the inclusive window [start, end]"""
+        lo, hi = self._clip(start, end)
+        if lo > hi:
+            return 0.0, 0.0
+        return (self.cum_inflow[hi + 1] - self.cum_inflow[lo],
+                self.cum_outflow[hi + 1] - self.cum_outflow[lo])
+
+    def events_between(self, start, end):
+        """Events in [start, end] as (date, amount, direction, item) tuples"""
+        lo, hi = self._clip(start, end)
+        first = bisect_left(self.day, lo)
+        last = bisect_right(self.day, hi)
+        return [(self.start + timedelta(days=self.day[i]), self.amount[i], self.direction[i], self.items[i])
+                for i in range(first, last)]
+
+    def balance_on(self, when):
+        """Projected balance at the end of `when`"""
+        offset = min(max((when - self.start).days, 0), self.days - 1)
+        return self.balances[offset]
+
+    def lowest_balance(self, start=None, end=None):
+        """(date, balance) of the lowest projected end-of-day balance in the window"""
+        lo, hi = self._clip(start or self.start, end or self.end)
+        offset = min(range(lo, hi + 1), key=self.balances.__getitem__)
+        return self.start + timedelta(days=offset), self.balances[offset]
+
+    def first_shortfall(self, threshold=0.0):
+        """First date the projected balance drops below `threshold`, or None"""
+        for offset, balance in enumerate(self.balances):
+            if balance < threshold:
+                return self.start + timedelta(days=offset)
+        return None
+
+def build_timeline(snapshot, start, days):
+    """Expand a snapshot into a CashFlowTimeline starting at `start`"""
+    account = snapshot['account']
+    opening = account['balance'] - snapshot['cushion'] if account else 0.0
+    timeline = CashFlowTimeline(start, days, opening)
+    end = timeline.end
+
+    for bill in snapshot['bills']:
+        for due in iter_bill_dates(bill, start, end):
+            timeline.add(due, bill['amount'], -1, dict(bill, calculated_due_date=due))
+
+    # Credit card minimum payments (always monthly)
+    for account in snapshot['credit_accounts']:
+        if account['minimum_payment'] and account['payment_due_day']:
+            for n in range((end.year - start.year) * 12 + end.month - start.month + 1):
+                due = add_months(start.year, start.month, n, account['payment_due_day'])
+                timeline.add(due, account['minimum_payment'], -1, {
+                    'name': f"{account['name']} - Min Payment",
+                    'amount': account['minimum_payment'],
+                    'category': 'Debt',
+                    'calculated_due_date': due,
+                    'is_credit_payment': True
+                })
+
+    # Past due amounts are owed now
+    for instance in snapshot['past_due_instances']:
+        timeline.add(start, instance['amount'], -1, {
+            'name': f"{instance['item_name']} - {instance['period']} (PAST DUE)",
+            'amount': instance['amount'],
+            'category': 'Past Due',
+            'calculated_due_date': start,
+            'is_past_due': True
+        })
+
+    # Use recurring income if available, otherwise fall back to regular income
+    if snapshot['recurring_income']:
+        for income in snapshot['recurring_income']:
+            for when in iter_recurrence_dates(income['frequency'], parse_date(income['start_date']),
+                                              parse_date(income['end_date']), income['day_of_month'],
+                                              start, end):
+                timeline.add(when, income['amount'], 1,
+                             {'source': income['source'], 'amount': income['amount'], 'date': when})
+    else:
+        for income in snapshot['expected_income']:
+            when = parse_date(income['date_expected'])
+            timeline.add(when, income['amount'], 1,
+                         {'source': income['source'], 'amount': income['amount'], 'date': when})
+
+    return timeline.finalize()
+
+def monthly_summary(timeline):
+    """Inflow, outflow and closing balance for each calendar month of the timeline"""
+    months = []
+    current = timeline.start
+    while current <= timeline.end:
+        month_end = min(date(current.year, current.month, monthrange(current.year, current.month)[1]),
+                        timeline.end)
+        inflow, outflow = timeline.totals_between(current, month_end)
+        low_date, low_balance = timeline.lowest_balance(current, month_end)
+        months.append({
+            'month': current.strftime('%Y-%m'),
+            'inflow': round(inflow, 2),
+            'outflow': round(outflow, 2),
+            'closing_balance': round(timeline.balance_on(month_end), 2),
+            'lowest_balance': round(low_balance, 2),
+            'lowest_balance_date': low_date.isoformat()
+        })
+        current = month_end + timedelta(days=1)
+    return months
@@ -0,0 +1,20 @@
+"""Gunicorn settings for wsgi:app"""
+import multiprocessing
+import os
+
+bind = os.environ.get('FINANCE_BIND', '0.0.0.0:5000')
+
+# Import the app (schema init + cache warm-up) once, then fork workers
+preload_app = True
+workers = int(os.environ.get('FINANCE_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Lets each worker size its risk-analysis process pool to its share of the CPUs
+os.environ['FINANCE_WORKERS'] = str(workers)
+
+# Threaded workers so long-lived /api/events streams don't tie up a process
+worker_class = 'gthread'
+threads = int(os.environ.get('FINANCE_THREADS', 8))
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
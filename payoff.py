@@ -0,0 +1,138 @@
+"""Credit payoff simulation for every card and loan at once
+
+Each strategy variant (minimum-only, avalanche or snowball plus an extra
+monthly amount) owns one slice of a flat balance array. A month of interest
+and minimum payments is applied to every account of every variant in a
+single pass; only the extra payment is routed account by account, in the
+variant's priority order.
+"""
+from array import array
+from datetime import date
+from operator import add, mul, sub
+
+from database import add_months
+
+STRATEGIES = ('minimum', 'avalanche', 'snowball')
+
+# Thirty years of monthly payments
+MAX_MONTHS = 360
+
+# Balances below this are treated as paid off (floating point dust)
+PAID_OFF = 0.005
+
+def payoff_order(accounts, strategy):
+    """Indexes of `accounts` in the order extra payments go to them
+
+    avalanche: highest APR first; snowball: smallest balance first.
+    """
+    indexes = range(len(accounts))
+    if strategy == 'avalanche':
+        return sorted(indexes, key=lambda i: (-(accounts[i]['apr'] or 0), accounts[i]['current_balance']))
+    if strategy == 'snowball':
+        return sorted(indexes, key=lambda i: (accounts[i]['current_balance'], -(accounts[i]['apr'] or 0)))
+    return []
+
+def simulate_payoff(accounts, variants, max_months=MAX_MONTHS, start=None, detail=False):
+    """Project month-by-month balances for each (strategy, extra) variant
+
+    Minimum-only pays each account's minimum and nothing more. Avalanche and
+    snowball spend a fixed budget every month (the starting minimums plus
+    `extra`), so minimums freed by paid-off accounts roll into the next one.
+    With `detail`, each account's month-end balances are included.
+    """
+    start = start or date.today()
+    accounts = [a for a in accounts if a['current_balance'] > 0]
+    n = len(accounts)
+    v = len(variants)
+
+    # Per-account columns, repeated once per variant
+    growth = [1 + (a['apr'] or 0) / 1200 for a in accounts] * v
+    minimums = [a['minimum_payment'] or 0 for a in accounts] * v
+    balances = [a['current_balance'] for a in accounts] * v
+    interest = [0.0] * (n * v)
+    paid = [0.0] * (n * v)
+    payoff_month = [None] * (n * v)
+    still_owing = list(range(n * v))
+
+    budgets = [sum(minimums[:n]) + extra if strategy != 'minimum' else 0
+               for strategy, extra in variants]
+    orders = [payoff_order(accounts, strategy) for strategy, extra in variants]
+    finished = [None if n else 0 for _ in variants]
+    totals = [[] for _ in variants]
+    history = []
+
+    for month in range(1, max_months + 1):
+        if all(done is not None for done in finished):
+            break
+
+        # Interest and minimum payments for every account of every variant
+        grown = list(map(mul, balances, growth))
+        accrued = list(map(sub, grown, balances))
+        payment = list(map(min, grown, minimums))
+        balances = list(map(sub, grown, payment))
+
+        for k, (strategy, extra) in enumerate(variants):
+            lo, hi = k * n, (k + 1) * n
+            # Whatever the budget doesn't need for minimums goes down the priority list
+            remaining = budgets[k] - sum(payment[lo:hi])
+            for i in orders[k]:
+                if remaining <= PAID_OFF:
+                    break
+                j = lo + i
+                amount = min(remaining, balances[j])
+                balances[j] -= amount
+                payment[j] += amount
+                remaining -= amount
+
+        interest = list(map(add, interest, accrued))
+        paid = list(map(add, paid, payment))
+        balances = [b if b >= PAID_OFF else 0.0 for b in balances]
+        settled = [j for j in still_owing if not balances[j]]
+        if settled:
+            for j in settled:
+                payoff_month[j] = month
+            still_owing = [j for j in still_owing if balances[j]]
+            # Paid-off accounts drop out of the extra-payment queues
+            for k in {j // n for j in settled}:
+                orders[k] = [i for i in orders[k] if balances[k * n + i]]
+
+        for k in range(v):
+            lo, hi = k * n, (k + 1) * n
+            if finished[k] is None:
+                remaining_balance = sum(balances[lo:hi])
+                totals[k].append(round(remaining_balance, 2))
+                if remaining_balance == 0:
+                    finished[k] = month
+
+        if detail:
+            history.append(array('d', balances))
+
+    def month_label(month):
+        return add_months(start.year, start.month, month, 1).strftime('%Y-%m') if month is not None else None
+
+    results = []
+    for k, (strategy, extra) in enumerate(variants):
+        lo = k * n
+        result = {
+            'strategy': strategy,
+            'extra': extra,
+            'months_to_payoff': finished[k],
+            'payoff_month': month_label(finished[k]),
+            'total_interest': round(sum(interest[lo:lo + n]), 2),
+            'total_paid': round(sum(paid[lo:lo + n]), 2),
+            'balances': totals[k],
+            'accounts': []
+        }
+        for i, account in enumerate(accounts):
+            row = {
+                'id': account['id'],
+                'name': account['name'],
+                'months_to_payoff': payoff_month[lo + i],
+                'payoff_month': month_label(payoff_month[lo + i]),
+                'interest': round(interest[lo + i], 2)
+            }
+            if detail:
+                row['balances'] = [round(balances_then[lo + i], 2) for balances_then in history]
+            result['accounts'].append(row)
+        results.append(result)
+    return results
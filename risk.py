@@ -0,0 +1,164 @@
+"""Monte Carlo risk analysis for the checkpoint planner
+
+Each checkpoint window is reduced to a fixed net amount plus the items that
+vary (paychecks, bills in variable categories). Batches of paths are sampled
+in worker processes: every variable item is drawn once per path in the
+batch and added to the running window totals, so the work per batch is one
+pass over the items. Batches that finish inside the latency budget are
+merged; the rest are cancelled, and batches already running stop at the
+deadline so the workers are free for the next request.
+
+Amounts are drawn as amount * max(0, 1 + cv * z), z standard normal, where
+cv is the item's coefficient of variation (0.1 = typically within 10%).
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from operator import add
+from time import time
+import multiprocessing
+import os
+import random
+import threading
+
+# Coefficient of variation by bill category; unlisted categories are fixed
+DEFAULT_CATEGORY_VARIANCE = {
+    'Utilities': 0.20,
+    'Food': 0.25,
+    'Transportation': 0.20,
+    'Healthcare': 0.30,
+    'Personal': 0.15,
+    'Other': 0.10,
+}
+
+# Coefficient of variation for paychecks not listed by source
+DEFAULT_INCOME_VARIANCE = 0.10
+
+# Paths sampled per batch (one task for a worker process)
+BATCH_SIZE = 1000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def default_workers():
+    """This process's share of the CPUs (FINANCE_WORKERS server processes share the machine)"""
+    server_workers = max(1, int(os.environ.get('FINANCE_WORKERS', 1)))
+    return max(1, (os.cpu_count() or 1) // server_workers)
+
+def get_pool():
+    """The shared worker pool, started on first use (FINANCE_RISK_WORKERS, 0 = run inline)"""
+    global _pool
+    workers = int(os.environ.get('FINANCE_RISK_WORKERS', default_workers()))
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers never inherit the server's threads or database handles
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def build_risk_plan(checkpoints, category_variance=None, income_variance=None):
+    """Reduce checkpoint windows to (fixed net, [(amount, cv, sign), ...]) pairs
+
+    `income_variance` is a cv for every paycheck or a {source: cv} dict
+    (missing sources use DEFAULT_INCOME_VARIANCE). Past due amounts are fixed.
+    """
+    category_variance = DEFAULT_CATEGORY_VARIANCE if category_variance is None else category_variance
+    if income_variance is None:
+        income_variance = DEFAULT_INCOME_VARIANCE
+
+    plan = []
+    for checkpoint in checkpoints:
+        fixed, variable = 0.0, []
+        for bill in checkpoint['bills']:
+            cv = 0 if bill.get('is_past_due') else category_variance.get(bill.get('category'), 0)
+            if cv:
+                variable.append((bill['amount'], cv, 1))
+            else:
+                fixed += bill['amount']
+        for paycheck in checkpoint['period_paychecks']:
+            cv = (income_variance.get(paycheck['source'], DEFAULT_INCOME_VARIANCE)
+                  if isinstance(income_variance, dict) else income_variance)
+            if cv:
+                variable.append((paycheck['amount'], cv, -1))
+            else:
+                fixed -= paycheck['amount']
+        plan.append((fixed, variable))
+    return plan
+
+def simulate_batch(plan, paths, seed, deadline=None):
+    """Sample `paths` outcomes per window; returns each window's mom_needs samples
+    
+    Returns None once `deadline` (a time.time() value) has passed.
+    """
+    rng = random.Random(seed)
+    gauss = rng.gauss
+    results = []
+    for fixed, variable in plan:
+        totals = [fixed] * paths
+        for amount, cv, sign in variable:
+            if deadline is not None and time() > deadline:
+                return None
+            draws = [sign * amount * max(0.0, 1 + cv * gauss(0, 1)) for _ in range(paths)]
+            totals = list(map(add, totals, draws))
+        results.append([total if total > 0 else 0.0 for total in totals])
+    return results
+
+def run_risk_analysis(plan, paths=5000, budget_seconds=2.0, seed=None):
+    """Sample up to `paths` paths within `budget_seconds`
+
+    Returns (per-window lists of mom_needs samples, paths completed,
+    whether the budget cut the run short).
+    """
+    # Wall-clock deadline, so worker processes can check it too
+    deadline = time() + budget_seconds
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    batches = [min(BATCH_SIZE, paths - start) for start in range(0, paths, BATCH_SIZE)]
+    samples = [[] for _ in plan]
+    completed = 0
+
+    def merge(batch, size):
+        nonlocal completed
+        for window, needs in zip(samples, batch):
+            window.extend(needs)
+        completed += size
+
+    pool = get_pool()
+    if pool is None:
+        for index, size in enumerate(batches):
+            batch = simulate_batch(plan, size, seed + index, deadline)
+            if batch is None:
+                return samples, completed, True
+            merge(batch, size)
+        return samples, completed, False
+
+    futures = {pool.submit(simulate_batch, plan, size, seed + index, deadline): size
+               for index, size in enumerate(batches)}
+    pending = set(futures)
+    cut_short = False
+    while pending:
+        remaining = deadline - time()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            batch = future.result()
+            if batch is None:
+                cut_short = True
+            else:
+                merge(batch, futures[future])
+    for future in pending:
+        future.cancel()
+    return samples, completed, cut_short or bool(pending)
+
+def summarize_window(needs):
+    """Shortfall probability and mom_needs distribution for one window"""
+    if not needs:
+        return {'shortfall_probability': None, 'expected_mom_needs': None,
+                'p50_mom_needs': None, 'p95_mom_needs': None}
+    ordered = sorted(needs)
+    count = len(ordered)
+    return {
+        'shortfall_probability': round(sum(1 for need in ordered if need > 0) / count, 4),
+        'expected_mom_needs': round(sum(ordered) / count, 2),
+        'p50_mom_needs': round(ordered[min(count - 1, count // 2)], 2),
+        'p95_mom_needs': round(ordered[min(count - 1, int(count * 0.95))], 2),
+    }
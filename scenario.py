@@ -0,0 +1,101 @@
+"""What-if scenarios layered over a read-only planner snapshot
+
+A scenario is a list of overrides ("rent +$200", "card paid off", "new
+bill"). Applying one never touches the database or the base snapshot: only
+the lists an override touches are rebuilt, and only the rows it changes are
+copied, so many scenarios share the same base data.
+
+Override forms (`table` is a snapshot list or 'account' / 'settings'):
+
+    {"op": "update", "table": "bills", "id": 1, "set": {"amount": 1900}}
+    {"op": "update", "table": "bills", "id": 1, "adjust": {"amount": 200}}
+    {"op": "remove", "table": "credit_accounts", "id": 4}
+    {"op": "insert", "table": "bills", "row": {"name": "Gym", "amount": 40, "due_day": 5}}
+    {"op": "update", "table": "account", "adjust": {"balance": -1500}}
+"""
+from datetime import date
+
+# Snapshot lists that can be overridden row by row
+ROW_TABLES = ('bills', 'credit_accounts', 'past_due_instances', 'recurring_income', 'expected_income')
+
+# Single-row snapshot entries
+SINGLE_TABLES = ('account', 'settings')
+
+# Defaults for rows added by an insert override
+INSERT_DEFAULTS = {
+    'bills': {'category': 'Other', 'due_day': None, 'due_date': None, 'frequency': 'monthly',
+              'autopay': 0, 'status': 'pending'},
+    'credit_accounts': {'account_type': 'credit_card', 'current_balance': 0.0, 'credit_limit': None,
+                        'minimum_payment': 0.0, 'apr': 0.0, 'payment_due_day': None},
+    'past_due_instances': {'item_name': 'Scenario item', 'period': ''},
+    'recurring_income': {'frequency': 'monthly', 'start_date': None, 'end_date': None, 'day_of_month': None},
+    'expected_income': {'source': 'Scenario income', 'status': 'expected'},
+}
+
+# Fields an inserted row must provide
+INSERT_REQUIRED = {
+    'bills': ('name', 'amount'),
+    'credit_accounts': ('name',),
+    'past_due_instances': ('amount',),
+    'recurring_income': ('source', 'amount'),
+    'expected_income': ('amount', 'date_expected'),
+}
+
+def changed_row(row, override):
+    """A copy of `row` with an override's `set` and `adjust` values applied"""
+    row = dict(row, **override.get('set', {}))
+    for field, delta in override.get('adjust', {}).items():
+        row[field] = (row.get(field) or 0) + delta
+    return row
+
+def apply_overrides(base, overrides):
+    """A snapshot with `overrides` applied, sharing everything unchanged with `base`"""
+    snapshot = dict(base)
+    copied = set()
+    next_id = -1
+
+    for override in overrides:
+        op, table = override.get('op'), override.get('table')
+
+        if table in SINGLE_TABLES:
+            if op != 'update':
+                raise ValueError(f"Only 'update' applies to {table}")
+            snapshot[table] = changed_row(snapshot[table] or {}, override)
+            continue
+        if table not in ROW_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+
+        # Copy a list the first time this scenario changes it
+        if table not in copied:
+            snapshot[table] = list(snapshot[table])
+            copied.add(table)
+        rows = snapshot[table]
+
+        if op == 'insert':
+            row = dict(INSERT_DEFAULTS[table], **override.get('row', {}))
+            missing = [field for field in INSERT_REQUIRED[table] if row.get(field) is None]
+            if missing:
+                raise ValueError(f"New {table} row needs: {', '.join(missing)}")
+            if table == 'recurring_income' and not row['start_date']:
+                row['start_date'] = date.today()
+            # Negative ids never collide with stored rows
+            row['id'] = next_id
+            next_id -= 1
+            rows.append(row)
+            continue
+
+        matches = [i for i, row in enumerate(rows) if row['id'] == override.get('id')]
+        if not matches:
+            raise ValueError(f"No {table} row with id {override.get('id')}")
+        if op == 'update':
+            for i in matches:
+                rows[i] = changed_row(rows[i], override)
+        elif op == 'remove':
+            for i in reversed(matches):
+                del rows[i]
+        else:
+            raise ValueError(f"Unknown op: {op}")
+
+    if snapshot['settings'] is not base['settings']:
+        snapshot['cushion'] = snapshot['settings'].get('cushion_amount') or 0
+    return snapshot
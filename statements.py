@@ -0,0 +1,200 @@
+"""Streaming parsers for bank and card statement files (CSV, OFX, QFX)
+
+Parsers read from a text stream and yield one transaction dict at a time,
+so parsing memory stays flat no matter how many years a file covers. Every
+transaction carries a content hash used to skip ones already imported.
+
+Transaction dict: account, posted_date (date), amount (negative = money
+out), description, memo, fit_id (the bank's id, OFX only), content_hash.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+import csv
+import hashlib
+import html
+import re
+
+# Header names recognised in CSV exports (compared lower-case)
+CSV_DATE_COLUMNS = ('date', 'posted date', 'posting date', 'transaction date', 'trans. date')
+CSV_AMOUNT_COLUMNS = ('amount', 'transaction amount')
+CSV_DEBIT_COLUMNS = ('debit', 'withdrawal', 'withdrawals')
+CSV_CREDIT_COLUMNS = ('credit', 'deposit', 'deposits')
+CSV_DESCRIPTION_COLUMNS = ('description', 'payee', 'name', 'merchant', 'details')
+CSV_MEMO_COLUMNS = ('memo', 'notes', 'category')
+
+CSV_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y', '%d %b %Y')
+
+# OFX/QFX: tags are read from fixed-size chunks of the stream
+OFX_CHUNK_SIZE = 65536
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+OFX_FIELDS = ('TRNTYPE', 'DTPOSTED', 'TRNAMT', 'FITID', 'NAME', 'PAYEE', 'MEMO')
+
+def transaction_hash(account, posted_date, amount, description, fit_id=None, ordinal=0):
+    """Content hash identifying a transaction across repeated or overlapping imports
+
+    With a bank-assigned FITID that id is the identity; otherwise date,
+    amount and description are, plus an ordinal so two identical purchases
+    on the same day stay distinct.
+    """
+    if fit_id:
+        key = f"{account}|fitid|{fit_id}"
+    else:
+        key = f"{account}|{posted_date.isoformat()}|{amount:.2f}|{' '.join(description.lower().split())}|{ordinal}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def with_hashes(transactions):
+    """Attach content hashes, numbering identical same-day transactions in file order
+
+    Counts are kept for the whole file (one small entry per distinct
+    transaction), so rows need not be sorted by date.
+    """
+    seen = {}
+    for txn in transactions:
+        key = (txn['posted_date'], txn['account'], txn['amount'], txn['description'])
+        ordinal = seen.get(key, 0)
+        seen[key] = ordinal + 1
+        txn['content_hash'] = transaction_hash(txn['account'], txn['posted_date'], txn['amount'],
+                                               txn['description'], txn.get('fit_id'), ordinal)
+        yield txn
+
+def parse_amount(value):
+    """Parse '1,234.56', '$-12.00', '(12.00)' or '12.00-' into a float"""
+    value = value.strip().replace('$', '').replace(',', '')
+    negative = value.startswith('(') and value.endswith(')') or value.endswith('-')
+    value = value.strip('()-+ ') if negative else value
+    amount = float(value)
+    return -amount if negative else amount
+
+@lru_cache(maxsize=4096)
+def parse_csv_date(value):
+    """Parse a statement date in any of CSV_DATE_FORMATS (rows share dates, so cached)"""
+    value = value.strip()
+    for fmt in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value}")
+
+def _find_column(header, names):
+    for index, column in enumerate(header):
+        if column.strip().lower() in names:
+            return index
+    return None
+
+def iter_csv_transactions(stream, account=''):
+    """Yield transactions from a CSV export
+
+    Uses the header row when there is one; a file whose first row is
+    already date, amount, ... (Wells Fargo style: date, amount, *, check
+    number, description) is read positionally.
+    """
+    reader = csv.reader(stream)
+    first = next(reader, None)
+    if first is None:
+        return
+
+    try:
+        parse_csv_date(first[0])
+        parse_amount(first[1])
+        # No header: date, amount, ..., description last
+        columns = {'date': 0, 'amount': 1, 'description': len(first) - 1}
+        rows = _chain_first(first, reader)
+    except (ValueError, IndexError):
+        columns = {
+            'date': _find_column(first, CSV_DATE_COLUMNS),
+            'amount': _find_column(first, CSV_AMOUNT_COLUMNS),
+            'debit': _find_column(first, CSV_DEBIT_COLUMNS),
+            'credit': _find_column(first, CSV_CREDIT_COLUMNS),
+            'description': _find_column(first, CSV_DESCRIPTION_COLUMNS),
+            'memo': _find_column(first, CSV_MEMO_COLUMNS),
+        }
+        if columns['date'] is None or (columns['amount'] is None and columns['debit'] is None):
+            raise ValueError('CSV needs a date column and an amount (or debit/credit) column')
+        rows = reader
+
+    for row in rows:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if columns.get('amount') is not None and row[columns['amount']].strip():
+            amount = parse_amount(row[columns['amount']])
+        else:
+            debit = row[columns['debit']].strip() if columns.get('debit') is not None else ''
+            credit = row[columns['credit']].strip() if columns.get('credit') is not None else ''
+            amount = (parse_amount(credit) if credit else 0.0) - (abs(parse_amount(debit)) if debit else 0.0)
+        description = row[columns['description']].strip() if columns.get('description') is not None else ''
+        memo = row[columns['memo']].strip() if columns.get('memo') is not None else None
+        yield {
+            'account': account,
+            'posted_date': parse_csv_date(row[columns['date']]),
+            'amount': round(amount, 2),
+            'description': description,
+            'memo': memo,
+            'fit_id': None,
+        }
+
+def _chain_first(first, rows):
+    yield first
+    yield from rows
+
+def parse_ofx_date(value):
+    """Parse an OFX date (YYYYMMDD, optionally followed by time and timezone)"""
+    value = value.strip()
+    return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+def iter_ofx_tags(stream):
+    """Yield (closing, tag, value) for each OFX tag, reading the stream in chunks"""
+    buffer = ''
+    while True:
+        chunk = stream.read(OFX_CHUNK_SIZE)
+        buffer += chunk
+        # Keep a trailing partial tag for the next chunk
+        cut = max(buffer.rfind('<'), 0) if chunk else len(buffer)
+        for match in OFX_TAG.finditer(buffer, 0, cut):
+            yield match.group(1) == '/', match.group(2).upper(), html.unescape(match.group(3).strip())
+        buffer = buffer[cut:]
+        if not chunk:
+            return
+
+def iter_ofx_transactions(stream, account=''):
+    """Yield transactions from an OFX or QFX file (SGML 1.x or XML 2.x)
+
+    The statement's ACCTID is used as the account unless one is given.
+    """
+    statement_account = account
+    current = None
+    for closing, tag, value in iter_ofx_tags(stream):
+        if tag == 'ACCTID' and not closing and not account:
+            statement_account = value
+        elif tag == 'STMTTRN':
+            if not closing:
+                current = {}
+            elif current is not None:
+                yield {
+                    'account': statement_account,
+                    'posted_date': parse_ofx_date(current['DTPOSTED']),
+                    'amount': round(parse_amount(current['TRNAMT']), 2),
+                    'description': current.get('NAME') or current.get('PAYEE') or current.get('TRNTYPE', ''),
+                    'memo': current.get('MEMO'),
+                    'fit_id': current.get('FITID'),
+                }
+                current = None
+        elif current is not None and not closing and tag in OFX_FIELDS:
+            current[tag] = value
+        elif tag in ('BANKTRANLIST', 'STMTRS', 'CCSTMTRS') and closing:
+            current = None
+
+def detect_format(filename, head):
+    """'ofx' or 'csv', from the file extension or the first bytes of the file"""
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('ofx', 'qfx'):
+        return 'ofx'
+    if extension == 'csv':
+        return 'csv'
+    text = head.lstrip().upper()
+    return 'ofx' if text.startswith((b'OFXHEADER', b'<?XML', b'<OFX')) else 'csv'
+
+def iter_statement(stream, file_format, account=''):
+    """Hashed transactions from a statement stream in the given format"""
+    parser = iter_ofx_transactions if file_format == 'ofx' else iter_csv_transactions
+    return with_hashes(parser(stream, account))
@@ -0,0 +1,17 @@
+"""Shared fixtures: each test runs against its own freshly initialized database"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DATABASE_NAME', str(tmp_path / 'finance.db'))
+    database.init_database()
+    yield database
+    database.release_connection()
@@ -0,0 +1,103 @@
+from datetime import date
+
+import app as finance_app
+
+
+def test_checkpoint_requirements_outside_request(db):
+    db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+    checkpoints = finance_app.calculate_checkpoint_requirements()
+    assert checkpoints
+
+
+def test_batch_rejects_non_object_body(db):
+    client = finance_app.app.test_client()
+    for body in ([{'op': 'create'}], 3, 'x', {'operations': {'op': 'create'}}):
+        response = client.post('/api/batch', json=body)
+        assert response.status_code == 200
+        assert response.get_json()['success'] is False
+
+    response = client.post('/api/batch', json={'operations': [7]})
+    assert response.get_json()['success'] is False
+
+
+def test_status_paid_through_api_is_recorded(db):
+    client = finance_app.app.test_client()
+    rent = db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+    gym = db.add_bill('Gym', 'Personal', 40.0, due_day=5)
+
+    assert client.put(f'/api/bill/{rent}', json={'amount': 1500, 'status': 'paid'}).get_json()['success']
+    assert client.post('/api/batch', json={'operations': [
+        {'op': 'update', 'table': 'bills', 'id': gym, 'data': {'status': 'paid'}}]}).get_json()['success']
+    # Already paid: no second entry
+    client.put(f'/api/bill/{rent}', json={'amount': 1500, 'status': 'paid'})
+
+    history = db.get_payment_history()
+    assert sorted((row['bill_id'], row['amount']) for row in history) == [(rent, 1500.0), (gym, 40.0)]
+
+
+def test_payment_ledger_endpoints(db):
+    client = finance_app.app.test_client()
+    rent = db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+    db.mark_bill_paid(rent, date.today())
+    response = client.post('/api/payments', json={'amount': -100, 'bill_id': rent, 'notes': 'refund'})
+    assert response.get_json()['success']
+
+    payments = client.get('/api/payments?limit=1').get_json()
+    assert [p['amount'] for p in payments['payments']] == [-100.0]
+    older = client.get(f"/api/payments?limit=1&before_id={payments['next_before_id']}").get_json()
+    assert [p['amount'] for p in older['payments']] == [1500.0]
+
+    spending = client.get('/api/analytics/spending-by-category').get_json()
+    assert spending['categories'] == [{'category': 'Housing', 'total': 1400.0, 'payment_count': 2}]
+
+
+def test_scenario_balance_and_cushion_changes_show_up(db):
+    client = finance_app.app.test_client()
+    db.update_account_balance(3000.0)
+    db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+
+    response = client.post('/api/scenarios', json={'scenarios': [
+        {'name': 'Lower balance', 'overrides': [{'op': 'update', 'table': 'account', 'adjust': {'balance': -1500}}]},
+        {'name': 'Bigger cushion', 'overrides': [{'op': 'update', 'table': 'settings', 'set': {'cushion_amount': 800}}]},
+    ]}).get_json()
+
+    assert response['success'], response
+    lower, cushion = response['scenarios']
+    assert lower['lowest_balance_change'] == -1500.0
+    assert cushion['lowest_balance_change'] == -300.0
+
+
+def test_batch_rejects_bad_values_and_missing_rows(db):
+    client = finance_app.app.test_client()
+    income_id = db.add_income('Paycheck', 900.0, date.today())
+    db.add_recurring_income('Job', 941.17, 'bi-weekly', date.today())
+    recurring_id = db.get_recurring_income()[0]['id']
+
+    bad_operations = [
+        {'op': 'update', 'table': 'income', 'id': income_id, 'data': {'amount': 'abc'}},
+        {'op': 'update', 'table': 'recurring_income', 'id': recurring_id, 'data': {'frequency': 'daily'}},
+        {'op': 'update', 'table': 'recurring_income', 'id': recurring_id, 'data': {'day_of_month': 40}},
+        {'op': 'create', 'table': 'income', 'data': {'amount': 10, 'date': '05/01/2026'}},
+        {'op': 'update', 'table': 'income', 'id': 9999, 'data': {'amount': 1}},
+        {'op': 'delete', 'table': 'bills', 'id': 9999},
+    ]
+    for operation in bad_operations:
+        response = client.post('/api/batch', json={'operations': [
+            {'op': 'update', 'table': 'income', 'id': income_id, 'data': {'amount': '950'}}, operation]})
+        assert response.get_json()['success'] is False, operation
+
+    # Nothing from the failed batches was saved
+    assert db.get_upcoming_income()[0]['amount'] == 900.0
+    assert client.get('/').status_code == 200
+
+
+def test_large_expenses_window_stops_at_occurrence_horizon(db):
+    db.add_bill('Tuition', 'Education', 4000.0, due_day=15)
+    client = finance_app.app.test_client()
+    horizon_end = db.get_bill_occurrence_horizon()[1]
+
+    data = client.get('/api/large-expenses?days=3650').get_json()
+    assert data['success'] is True
+    assert data['end'] == horizon_end.isoformat()
+    assert data['days'] == (horizon_end - date.today()).days
+    assert all(item['due_date'] <= data['end'] for item in data['expenses'])
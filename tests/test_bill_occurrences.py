@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from database import add_months
+
+
+def month_range(today, months):
+    start = add_months(today.year, today.month, months, 1)
+    return start, add_months(start.year, start.month, 1, 1) - timedelta(days=1)
+
+
+def test_paid_bill_still_due_in_future_months(db):
+    today = date.today()
+    rent = db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+    db.mark_bill_paid(rent, today)
+
+    start, end = month_range(today, 3)
+    assert [(bill['id'], bill['calculated_due_date']) for bill in db.get_bills_for_period(start, end)] == \
+        [(rent, start)]
+
+
+def test_paid_bill_settled_for_current_month_in_any_range(db):
+    today = date.today()
+    rent = db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+    db.mark_bill_paid(rent, today)
+
+    # Starts last month and runs into next month: only this month is settled
+    start = add_months(today.year, today.month, -1, 25)
+    end = add_months(today.year, today.month, 1, 5)
+    due = [bill['calculated_due_date'] for bill in db.get_bills_for_period(start, end)]
+    assert due == [add_months(today.year, today.month, 1, 1)]
+
+
+def test_every_frequency_recurs(db):
+    today = date.today()
+    first = add_months(today.year, today.month, 1, 10)
+    for frequency in ('bi-monthly', 'quarterly', 'semi-annual', 'annual'):
+        db.add_bill(frequency, 'Other', 10.0, frequency=frequency, due_date=first)
+
+    start, end = first, add_months(first.year, first.month, 12, 9)
+    counts = {}
+    for bill in db.get_bills_for_period(start, end):
+        counts[bill['name']] = counts.get(bill['name'], 0) + 1
+    assert counts == {'bi-monthly': 6, 'quarterly': 4, 'semi-annual': 2, 'annual': 1}
+
+
+def test_reads_do_not_write(db):
+    db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+    version = db.get_data_version()
+    horizon = db.get_bill_occurrence_horizon()
+
+    db.get_bills_for_period(date(9000, 1, 1), date(9999, 12, 31))
+    db.get_upcoming_obligations(date.today(), date(9999, 12, 31))
+
+    assert db.get_data_version() == version
+    assert db.get_bill_occurrence_horizon() == horizon
+
+
+def test_schedule_change_regenerates_occurrences(db):
+    today = date.today()
+    rent = db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+    db.update_bill(rent, due_day=15)
+
+    start, end = month_range(today, 2)
+    assert [bill['calculated_due_date'] for bill in db.get_bills_for_period(start, end)] == \
+        [start.replace(day=15)]
+
+
+def test_failed_commit_maintenance_still_changes_version(db, caplog):
+    version = db.get_data_version()
+    conn = db.get_connection()
+    conn.execute('DROP TABLE data_generation')
+    # A view can be read but not updated, so the generation bump fails
+    conn.execute(f'CREATE VIEW data_generation AS SELECT 1 AS id, {version} AS generation')
+    conn.commit()
+
+    db.add_bill('Rent', 'Housing', 1500.0, due_day=1)
+
+    assert 'Skipped commit maintenance' in caplog.text
+    assert db.get_data_version() != version
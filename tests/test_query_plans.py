@@ -0,0 +1,20 @@
+from datetime import date, timedelta
+
+import pytest
+
+from database import HOT_QUERIES
+
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_index(db, name):
+    result = db.check_query_plans()[name]
+    assert result['uses_index'], result['plan']
+
+
+def test_property_transactions_limited_to_months(db):
+    today = date.today()
+    db.add_property_transaction('expense', 'Old repair', 100.0, today - timedelta(days=400))
+    db.add_property_transaction('income', 'Rent', 900.0, today - timedelta(days=10))
+
+    assert [row['description'] for row in db.get_property_transactions(3)] == ['Rent']
+    assert len(db.get_property_transactions(24)) == 2
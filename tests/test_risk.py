@@ -0,0 +1,28 @@
+from time import time
+
+import risk
+
+PLAN = [(100.0, [(1000.0, 0.2, 1), (900.0, 0.1, -1)])] * 3
+
+
+def test_batch_stops_at_deadline():
+    assert risk.simulate_batch(PLAN, 10, seed=1, deadline=time() - 1) is None
+    assert len(risk.simulate_batch(PLAN, 10, seed=1, deadline=time() + 60)) == len(PLAN)
+
+
+def test_inline_run_reports_cut_short(monkeypatch):
+    monkeypatch.setenv('FINANCE_RISK_WORKERS', '0')
+    samples, completed, cut_short = risk.run_risk_analysis(PLAN, paths=2500, budget_seconds=60, seed=7)
+    assert (completed, cut_short) == (2500, False)
+    assert all(len(window) == 2500 for window in samples)
+
+    samples, completed, cut_short = risk.run_risk_analysis(PLAN, paths=2500, budget_seconds=0, seed=7)
+    assert (completed, cut_short) == (0, True)
+
+
+def test_pool_share_of_cpus(monkeypatch):
+    monkeypatch.setattr(risk.os, 'cpu_count', lambda: 8)
+    monkeypatch.setenv('FINANCE_WORKERS', '4')
+    assert risk.default_workers() == 2
+    monkeypatch.setenv('FINANCE_WORKERS', '17')
+    assert risk.default_workers() == 1
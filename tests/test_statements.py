@@ -0,0 +1,21 @@
+import io
+
+from statements import iter_statement
+
+UNSORTED = """Date,Amount,Description
+01/05/2026,-4.50,COFFEE
+01/06/2026,-20.00,GROCERIES
+01/05/2026,-4.50,COFFEE
+"""
+
+
+def test_identical_same_day_rows_get_distinct_hashes_in_any_order():
+    hashes = [txn['content_hash'] for txn in iter_statement(io.StringIO(UNSORTED), 'csv', 'checking')]
+    assert len(set(hashes)) == 3
+
+
+def test_reimport_is_skipped(db):
+    def transactions():
+        return iter_statement(io.StringIO(UNSORTED), 'csv', 'checking')
+    assert db.import_bank_transactions(transactions()) == (3, 0)
+    assert db.import_bank_transactions(transactions()) == (0, 3)
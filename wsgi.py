@@ -0,0 +1,11 @@
+"""Production WSGI entry point
+
+    pip install gunicorn
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) this module is imported once in the
+master process: migrations run and caches are warmed before workers fork.
+"""
+from app import app, prepare_app
+
+prepare_app()